@@ -4,11 +4,7 @@
 import cProfile
 import pstats
 
-from vispy.app import Timer, run as vispy_run
-
-from automaton import *
-from environment import *
-from stats import *
+from simulation import *
 from visualisation import *
 
 class Main:
@@ -33,13 +29,16 @@ class Main:
     """
 
     def __init__(self):
-        self.stats = Stats()
-        self.environments = Environment(self.stats)
-        self.automaton = Automaton(self.stats, self.environments)
+        self.simulation = Simulation()
+        self.stats = self.simulation.stats
+        self.environments = self.simulation.environments
+        self.automaton = self.simulation.automaton
         self.visualisation = Visualisation(self.stats, self.environments)
-        self.simulationRecorder = SimulationRecorder()
+        self.simulation.visualisation = self.visualisation
+        self.simulationRecorder = self.simulation.simulationRecorder
 
         # Timer setup for simulation loop
+        from vispy.app import Timer
         self.turn = 0
         self.timer = Timer(0.5, connect=self.run, iterations=-1, start=True)
         self.fastForward = True
@@ -48,15 +47,13 @@ class Main:
         if self.turn > NUM_STEPS:
             if self.timer.running:
                 self.timer.stop()
-            self.stats.endRun()
-            self.visualisation.endRun(NUM_STEPS)
-            self.simulationRecorder.end()
+            self.simulation.end()
             return
         
         #try:
         if self.fastForward:
+            self.timer.stop()
             while self.turn <= NUM_STEPS:
-                self.timer.stop()
                 self.runLoop(self.turn, self.turn == NUM_STEPS)
         else:
             if not self.timer.running:
@@ -68,17 +65,13 @@ class Main:
         #        self.timer.stop()
 
     def runLoop(self, turn, end):
-        print(f"turn {self.turn} starting!")
-        print(f"Timer running: {self.timer.running}")
-        self.stats.beginTurn()
-        self.environments.runLoop(turn)
-        self.visualisation.runLoop(turn, end=end)
-        self.automaton.runLoop(turn)
-        self.stats.endTurn()
-        self.simulationRecorder.endTurn()
+        log = SimulationLog()
+        log.debug("turn", "turn {} starting!", self.turn)
+        log.debug("turn", "Timer running: {}", self.timer.running)
+        self.simulation.step()
         self.turn += 1
-        print(f"turn {self.turn} over!")
-        print(f"Timer running: {self.timer.running}")
+        log.debug("turn", "turn {} over!", self.turn)
+        log.debug("turn", "Timer running: {}", self.timer.running)
 
 # Profiling Block
 if __name__ == "__main__":
@@ -89,6 +82,7 @@ if __name__ == "__main__":
     # Run your simulation
     main = Main()
     main.run()
+    from vispy.app import run as vispy_run
     vispy_run()
 
     # Stop profiling
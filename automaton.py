@@ -1,39 +1,130 @@
 # AUTOMATON SIMULATION FILE: GAME OF WHY
 # CHARIS CAT 2024
 
+import numpy as np
 import random
 from config import *
 from cell import *
+from simulation_random import SimulationRandom
+from simulation_recorder import SimulationRecorder
 
 # Automaton manages the Cells & Organisms
 class Automaton:
     def __init__(self, stats, environments):
-        self.cells = []
         self.stats = stats
         self.environments = environments
+        self.population = environments.population
 
         self.initialize()
 
     def initialize(self):
-        for _ in range(CELL_BASE_COUNT):
-            x, y = random.randint(0, GRID_SIZE - 1), random.randint(0, GRID_SIZE - 1)
-            if self.environments.canAddCellAt(x, y):
-                organism = None # Organism(next_organism_id)
-                # next_organism_id += 1
-                new_cell = Cell(x, y, self.stats, self.environments, organismCheck=organism)
-                new_cell.role = random.choice(CELL_ROLES)
-                #new_cell.state = cell.state if random.random() < .001 else False #random.choice([True, False])
-                self.cells.append(new_cell)
-                # organism.add_cell(new_cell)
-                # organisms.append(organism)
-                self.environments.setCellAt(x, y, new_cell)
-            else:
-                self.stats.addCellBabyFailed("Overpopulation (initial)")
+        # Draw every starting square at once, a square drawn twice (or already taken) only hosts the first cell
+        positions = SimulationRandom().generator("spawn").integers(0, GRID_SIZE, size=(CELL_BASE_COUNT, 2))
+        _, first = np.unique(positions, axis=0, return_index=True)
+        first = np.sort(first)
+        first = first[self.environments.getEmptyMask()[positions[first, 0], positions[first, 1]]]
+        for _ in range(CELL_BASE_COUNT - len(first)):
+            self.stats.addCellBabyFailed("Overpopulation (initial)")
+
+        organism = None # Organism(next_organism_id)
+        # next_organism_id += 1
+        new_cells = [Cell(x, y, self.stats, self.environments, organismCheck=organism, spawn=False) for x, y in positions[first].tolist()]
+        self.population.spawnNew(np.array([cell.slot for cell in new_cells], dtype=np.intp), self.stats)
+        for new_cell in new_cells:
+            new_cell.role = SimulationRandom().random("spawn").choice(CELL_ROLES)
+            #new_cell.state = cell.state if random.random() < .001 else False #random.choice([True, False])
+            # organism.add_cell(new_cell)
+            # organisms.append(organism)
+            self.environments.setCellAt(new_cell.x, new_cell.y, new_cell)
+            self.population.schedule(new_cell.slot)
+            new_cell.saveBirthStats()
+        SimulationRecorder().recordBirths(new_cells)
+
+    # Living cells that still get a turn
+    @property
+    def cells(self):
+        return [self.population.cells[slot] for slot in self.population.getScheduledSlots()]
+
+    # Reproduction of every cell of slots in one go: the parents are picked over the whole batch, the litter is
+    # placed on free diagonals and spawned together
+    def reproduce(self, slots):
+        population = self.population
+        parents = population.reproduce(slots, self.stats)
+        inert = population.getStateMask(parents, CellState.INERT) # inert cells 'birth' enrichment onto environment
+        gone = self.environments.disintegrate(parents[inert])
+        SimulationRecorder().recordDeaths([population.cells[slot] for slot in gone.tolist()])
+        parents, babiesX, babiesY, crowded = self.environments.findBirthSquares(parents[~inert])
+
+        reproductionFailureCost = population.energy[crowded]/CELL_REPRODUCTION_FAILURE_COST
+        population.energy[crowded] = reproductionFailureCost
+        population.energyStorage[crowded] -= reproductionFailureCost/5
+        self.stats.addCellBabyFailed("Overpopulation", len(crowded))
+        population.remember(crowded, "Didn't have room for even 1 bebe :(")
+        population.fertilityRate[crowded] += population.turnRollAlt[crowded]
+
+        reproductionCost = population.energy[parents]/CELL_REPRODUCTION_SUCCESS_COST
+        population.energy[parents] = reproductionCost
+        population.energyStorage[parents] -= reproductionCost/5
+        babies = []
+        parentCells = [population.cells[parent] for parent in parents.tolist()]
+        for parent, x, y in zip(parentCells, babiesX.tolist(), babiesY.tolist()):
+            babies.append(Cell(x, y, self.stats, self.environments, organismCheck=parent.organism, parent=parent, spawn=False))
+        population.spawnChildren(np.array([baby.slot for baby in babies], dtype=np.intp), parents, self.stats)
+        rng = SimulationRandom().random("reproduction")
+        for baby, parent in zip(babies, parentCells):
+            baby.role = rng.choice([parent.role, rng.choice(CELL_ROLES)])
+            self.environments.setCellAt(baby.x, baby.y, baby)
+            population.schedule(baby.slot)
+            baby.saveBirthStats()
+        SimulationRecorder().recordBirths(babies)
+
+        attractive = population.attractiveness[parents] >= ((population.attractivenessTopRecord[parents]/10)*9)
+        fertile, attractive = parents[~attractive], parents[attractive]
+        population.remember(fertile, "Wait, une bebe?! Where did this thing come from!?", population.fertilityRate[fertile])
+        population.fertilityRate[fertile] += population.luckChoices(fertile, SimulationRandom().generator("reproduction")) * population.turnRollAlt[fertile]
+        self.stats.addCellBaby("Fertile", len(fertile))
+        population.remember(attractive, "Can't believe i'm finally a parent!", population.attractiveness[attractive])
+        population.fertilityRate[attractive] += population.turnRoll[attractive]
+        self.stats.addCellBaby("Attractive", len(attractive))
 
     def runLoop(self, turn):
-        for x in range(self.environments.grid.shape[0]):
-            for y in range(self.environments.grid.shape[1]):
-                cell = self.environments.grid[x,y]
-                if isinstance(cell, Cell):
-                    if cell.needTurn(turn):
-                        cell.runLoop(turn)
+        self.population.recycleSlots()
+        slots = self.population.getScheduledSlots()
+        slots = slots[self.population.turnCount[slots] < turn] # cells that need a turn
+        playing = [self.population.cells[slot] for slot in slots.tolist()]
+        self.population.turnCount[slots] = turn
+        self.population.drawTurnInfo(slots, self.environments.inertGrid)
+
+        if CELL_MOVEMENT_MODE == "batch":
+            self.environments.moveCells(slots)
+        else:
+            moving, playing = playing, []
+            for cell in moving:
+                if self.population.scheduled[cell.slot]: # not squished earlier this turn
+                    cell.move()
+                    playing.append(cell)
+
+        # Light absorption (and emission) of every cell still on the board in one exchange with the light grid
+        slots = np.array([cell.slot for cell in playing if self.population.occupied[cell.slot]], dtype=np.intp)
+        self.environments.exchangeLight(slots)
+
+        slots = np.array([cell.slot for cell in playing if cell.alive], dtype=np.intp)
+        self.population.phaseTransition(slots, self.stats)
+
+        self.reproduce(np.array([cell.slot for cell in playing], dtype=np.intp))
+
+        # The cells that disintegrated are off the board, they only pass on their memoir
+        for cell in playing:
+            if not self.population.occupied[cell.slot]:
+                cell.summarizeMemory()
+        playing = [cell for cell in playing if self.population.occupied[cell.slot]]
+
+        # Decay every living cell in one sweep, only the ones dying this turn go through the per cell path
+        slots = np.array([cell.slot for cell in playing if cell.alive], dtype=np.intp)
+        dying = [self.population.cells[slot] for slot in self.population.decay(slots)]
+        SimulationRecorder().recordDeaths(dying)
+        for cell in dying:
+            cell.die(record=False)
+
+        for cell in playing:
+            cell.endTurn()
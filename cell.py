@@ -1,53 +1,84 @@
 # CELL CLASS FILE: GAME OF WHY
 # CHARIS CAT 2024
 
-from matplotlib.colors import hsv_to_rgb
+import numpy as np
 import random
 from config import *
 from simulation_recorder import SimulationRecorder
+from simulation_random import SimulationRandom
+from simulation_log import SimulationLog
+from genealogy import NO_PARENT
+from cell_population import EMPTY_SLOT, INHERITED_TRAITS, PopulationColumn, PHASE_MEMORIES, classifyPhase
 
+# A Cell is a view over its slot in the environment's CellPopulation: the traits below live in the population columns
 class Cell:
-    topEnergy = 1
-    CellAttractivenessTopRecord = CELL_ATTRACTIVENESS_TOP_RECORD_INIT
+    # The fields that aren't population columns, a cell carries no __dict__
+    __slots__ = ("id", "environment", "population", "slot", "role", "organism", "stats", "previousAlive",
+                 "previousEnergy", "previousPosition") # filled in by simulation_tester
+    generalStatsList = INHERITED_TRAITS
     ratioResult = 0
     attractivenessGain = 0
-    def __init__(self, x, y, stats, environment, organismCheck=None, parent=None):
-        self.generalStatsList = ["growthRate",
-        "resilience",
-        "perception",
-        "speed",
-        "lightEmission",
-        "lightAbsorption",
-        "inertEmission",
-        "inertAbsorption",
-        "lifeExpectancyMin",
-        "lifeExpectancyMax",
-        "fertilityRate",
-        "fertilityAgeMin",
-        "fertilityAgeMax",
-        "fertilityEnergy",
-        "mass",
-        "height",
-        "lightStorage",
-        "energyStorage",
-        "inertStorage",
-        "mutationRate",
-        "color",
-        "growthDecayRate",
-        "luck",]
+
+    alive = PopulationColumn()
+    x = PopulationColumn()
+    y = PopulationColumn()
+    turnCount = PopulationColumn()
+    parentId = PopulationColumn()
+    prevX = PopulationColumn()
+    prevY = PopulationColumn()
+    moveLoopCounter = PopulationColumn()
+    energy = PopulationColumn()
+    age = PopulationColumn()
+    attractiveness = PopulationColumn()
+    cellEnergyRecord = PopulationColumn()
+    topEnergyDecay = PopulationColumn()
+    topEnergy = PopulationColumn()
+    CellAttractivenessTopRecord = PopulationColumn("attractivenessTopRecord")
+    turnRoll = PopulationColumn()
+    turnRollAlt = PopulationColumn()
+    tightTurnRoll = PopulationColumn()
+    inertUnderCell = PopulationColumn()
+    lifeExpectancy = PopulationColumn()
+    prefHeight = PopulationColumn()
+    growthRate = PopulationColumn()
+    resilience = PopulationColumn()
+    perception = PopulationColumn()
+    speed = PopulationColumn()
+    lightEmission = PopulationColumn()
+    lightAbsorption = PopulationColumn()
+    inertEmission = PopulationColumn()
+    inertAbsorption = PopulationColumn()
+    lifeExpectancyMin = PopulationColumn()
+    lifeExpectancyMax = PopulationColumn()
+    fertilityRate = PopulationColumn()
+    fertilityAgeMin = PopulationColumn()
+    fertilityAgeMax = PopulationColumn()
+    fertilityEnergy = PopulationColumn()
+    mass = PopulationColumn()
+    height = PopulationColumn()
+    lightStorage = PopulationColumn()
+    energyStorage = PopulationColumn()
+    inertStorage = PopulationColumn()
+    mutationRate = PopulationColumn()
+    color = PopulationColumn()
+    growthDecayRate = PopulationColumn()
+    luck = PopulationColumn()
+
+    def __init__(self, x, y, stats, environment, organismCheck=None, parent=None, spawn=True):
         self.id = stats.getCellNextID() # Cell ID
-        self.alive = True
         self.environment = environment
+        self.population = environment.population
+        self.slot = self.population.allocate(self)
+        self.alive = True
         self.age = 0  # cell age (in turns)
         self.role = "general"  # Role of the cell: general, structural, sensory, reproductive
         self.organism = organismCheck  # Tracks which organism this cell belongs to
-        self.parent = parent
+        self.parentId = parent.id if parent is not None else NO_PARENT # only the id, ancestors don't stay in memory
         self.stats = stats
         self.attractiveness = CELL_BASE_ATTRACTIVENESS_MIN
         self.growthDecayRate = CELL_BASE_GROWTH_DECAY_RATE
         self.x = x # position x
         self.y = y # position y
-        self.memory = []
         self.previousAlive = 0
         self.topEnergyDecay = 0
         self.luck = 0 # UNIMPLEMENTED: range -100 to 100
@@ -60,324 +91,137 @@ class Cell:
         self.tightTurnRoll = 1
         # random.choices([-1, 1], weights = [(self.luck + 100)/200), (1-((self.luck + 100)/200)]) # Luck (assuming scaled -100 to 100) and a random chance weight the + or - choice
 
-        if parent is None:
-            self.spawnNew()
-        else:
-            self.spawnChild(parent)
+        # spawn=False leaves the traits to a batch spawn over the population, followed by registerBirth()
+        if spawn:
+            if parent is None:
+                self.spawnNew()
+            else:
+                self.spawnChild(parent)
+            self.registerBirth()
+
+    def registerBirth(self):
         self.saveBirthStats()
         SimulationRecorder().recordBirth(self)
 
-    def getTurnInfo(self):
-        self.turnRoll = random.uniform(0.6, 1.4)
-        self.turnRollAlt = random.uniform(0.7, 1.3)
-        self.tightTurnRoll = random.uniform(0.9, 1.1)
-        self.inertUnderCell = self.environment.getInertAt(self.x, self.y)
+    @property
+    def state(self):
+        return self.population.getCellState(self.slot)
+
+    @state.setter
+    def state(self, state):
+        self.population.setCellState(self.slot, state)
+
+    # Remember one of the MEMORY_EVENTS, with its payload if it has one
+    def remember(self, event, payload=np.nan):
+        self.population.rememberSlot(self.slot, event, payload)
 
     def saveBirthStats(self):
-        onBirthStats = (f"\n Hey, Cell {self.id} here. Just passing on my birth certificate! Born to {self.parent} on turn {self.turnCount}, at {self.x},{self.y}. Cell role: {self.role}. Attractiveness: {self.attractiveness}. Growth Decay Rate: {self.growthDecayRate}. Luck: {self.luck}. Highest Energy: {self.cellEnergyRecord}. Energy: {self.energy}. Growth Rate: {self.growthRate}. Resilience: {self.resilience}. Perception Strength: {self.perception}. Speed: {self.speed}. Light Emission: {self.lightEmission}. Light Absorption: {self.lightAbsorption}. Mutation Rate: {self.mutationRate}. Life Expectancy: {self.lifeExpectancy}. Fertility Rate: {self.fertilityRate}. Fertility Age: {self.fertilityAgeMin} - {self.fertilityAgeMax}. Energy needed for reproduction: {self.fertilityEnergy}. Mass: {self.mass}. Height: {self.height}. Colour: {self.color}.")
+        onBirthStats = (f"\n Hey, Cell {self.id} here. Just passing on my birth certificate! Born to {self.parentId if self.parentId != NO_PARENT else None} on turn {self.turnCount}, at {self.x},{self.y}. Cell role: {self.role}. Attractiveness: {self.attractiveness}. Growth Decay Rate: {self.growthDecayRate}. Luck: {self.luck}. Highest Energy: {self.cellEnergyRecord}. Energy: {self.energy}. Growth Rate: {self.growthRate}. Resilience: {self.resilience}. Perception Strength: {self.perception}. Speed: {self.speed}. Light Emission: {self.lightEmission}. Light Absorption: {self.lightAbsorption}. Mutation Rate: {self.mutationRate}. Life Expectancy: {self.lifeExpectancy}. Fertility Rate: {self.fertilityRate}. Fertility Age: {self.fertilityAgeMin} - {self.fertilityAgeMax}. Energy needed for reproduction: {self.fertilityEnergy}. Mass: {self.mass}. Height: {self.height}. Colour: {self.color}.")
             
-        with open("birthDeathStats.txt", "a") as file:
-            file.write(onBirthStats + "\n")
-
-        print(f"Cell {self.id} birth written to birthDeathStats.txt successfully!")
+        SimulationRecorder().writeCertificate(onBirthStats)
         
     def spawnNew(self):
-        self.turnCount = 0
-        self.energy = random.uniform(CELL_BASE_ENERGY_MIN, CELL_BASE_ENERGY_MAX)  # Starting energy level
-        self.phaseTransition() # Call to set cell state & color
-
-        # INDIVIDUAL CELL BEHAVIOURS
-        match self.state:
-            case CellState.PLASMA:
-                self.growthRate = random.uniform(CELL_PLASMA_GROWTHRATE_MIN, CELL_PLASMA_GROWTHRATE_MAX)  # Energy Absorption
-                self.resilience = random.uniform(CELL_PLASMA_RESILIENCE_MIN, CELL_PLASMA_RESILIENCE_MAX)  # 'toughness'
-                self.perception = random.uniform(CELL_PLASMA_PERCEPTION_MIN, CELL_PLASMA_PERCEPTION_MAX)  # Sensory acuity
-                self.speed = random.uniform(CELL_PLASMA_SPEED_MIN, CELL_PLASMA_SPEED_MAX)  # movement speed
-                self.lightEmission = random.uniform(CELL_PLASMA_LIGHTEMISSION_MIN, CELL_PLASMA_LIGHTEMISSION_MAX)  # Amount of light emitted (e.g., by plasma or bioluminescence)
-                self.lightAbsorption = random.uniform(CELL_PLASMA_LIGHTABSORPTION_MIN, CELL_PLASMA_LIGHTABSORPTION_MAX)  # Ability to absorb light as energy
-                self.inertEmission = random.uniform(CELL_PLASMA_INERTEMISSION_MIN, CELL_PLASMA_INERTEMISSION_MAX)
-                self.inertAbsorption = random.uniform(CELL_PLASMA_INERTABSORPTION_MIN, CELL_PLASMA_INERTABSORPTION_MAX)
-                self.mutationRate = random.uniform(CELL_PLASMA_MUTATIONRATE_MIN, CELL_PLASMA_MUTATIONRATE_MAX)  # Probability of mutation during reproduction
-                self.lifeExpectancyMin = random.uniform(CELL_PLASMA_LIFEEXPECTANCYMIN_MIN, CELL_PLASMA_LIFEEXPECTANCYMIN_MAX)
-                self.lifeExpectancyMax = random.uniform(CELL_PLASMA_LIFEEXPECTANCYMAX_MIN, CELL_PLASMA_LIFEEXPECTANCYMAX_MAX)
-                self.lifeExpectancy = random.uniform(self.lifeExpectancyMin, self.lifeExpectancyMax)
-                self.fertilityRate = random.uniform(CELL_PLASMA_FERTILITYRATE_MIN, CELL_PLASMA_FERTILITYRATE_MAX)
-                self.fertilityAgeMin = random.uniform(CELL_PLASMA_FERTILITYAGEMIN_MIN, CELL_PLASMA_FERTILITYAGEMIN_MAX)
-                self.fertilityAgeMax = random.uniform(CELL_PLASMA_FERTILITYAGEMAX_MIN, CELL_PLASMA_FERTILITYAGEMAX_MAX)
-                self.fertilityEnergy = random.uniform(CELL_PLASMA_FERTILITYENERGY_MIN, CELL_PLASMA_FERTILITYENERGY_MAX)
-                self.mass = random.uniform(CELL_PLASMA_MASS_MIN, CELL_PLASMA_MASS_MAX)
-                self.height = random.uniform(CELL_PLASMA_HEIGHT_MIN, CELL_PLASMA_HEIGHT_MAX)
-                self.prefHeight = random.uniform(CELL_PLASMA_PREFHEIGHT_MIN, CELL_PLASMA_PREFHEIGHT_MAX)
-                self.lightStorage = random.uniform (CELL_PLASMA_LIGHTSTORAGE_MIN, CELL_PLASMA_LIGHTSTORAGE_MAX)
-                self.energyStorage = random.uniform(CELL_PLASMA_ENERGYSTORAGE_MIN, CELL_PLASMA_ENERGYSTORAGE_MAX)
-                self.inertStorage = random.uniform(CELL_PLASMA_INERTSTORAGE_MIN, CELL_PLASMA_INERTSTORAGE_MAX)
-                self.color = random.uniform(CELL_PLASMA_COLOR_MIN, CELL_PLASMA_COLOR_MIN)
-            case CellState.GAS:
-                self.growthRate = random.uniform(CELL_GAS_GROWTHRATE_MIN, CELL_GAS_GROWTHRATE_MAX)
-                self.resilience = random.uniform(CELL_GAS_RESILIENCE_MIN, CELL_GAS_RESILIENCE_MAX)
-                self.perception = random.uniform(CELL_GAS_PERCEPTION_MIN, CELL_GAS_PERCEPTION_MAX)
-                self.speed = random.uniform(CELL_GAS_SPEED_MIN, CELL_GAS_SPEED_MAX)
-                self.lightEmission = random.uniform(CELL_GAS_LIGHTEMISSION_MIN, CELL_GAS_LIGHTEMISSION_MAX)
-                self.lightAbsorption = random.uniform(CELL_GAS_LIGHTABSORPTION_MIN, CELL_GAS_LIGHTABSORPTION_MAX)
-                self.inertEmission = random.uniform(CELL_GAS_INERTEMISSION_MIN, CELL_GAS_INERTEMISSION_MAX)
-                self.inertAbsorption = random.uniform(CELL_GAS_INERTABSORPTION_MIN, CELL_GAS_INERTABSORPTION_MAX)
-                self.mutationRate = random.uniform(CELL_GAS_MUTATIONRATE_MIN, CELL_GAS_MUTATIONRATE_MAX)
-                self.lifeExpectancyMin = random.uniform(CELL_GAS_LIFEEXPECTANCYMIN_MIN, CELL_GAS_LIFEEXPECTANCYMIN_MAX)
-                self.lifeExpectancyMax = random.uniform(CELL_GAS_LIFEEXPECTANCYMAX_MIN, CELL_GAS_LIFEEXPECTANCYMAX_MAX)
-                self.lifeExpectancy = random.uniform(self.lifeExpectancyMin, self.lifeExpectancyMax)
-                self.fertilityRate = random.uniform(CELL_GAS_FERTILITYRATE_MIN, CELL_GAS_FERTILITYRATE_MAX)
-                self.fertilityAgeMin = random.uniform(CELL_GAS_FERTILITYAGEMIN_MIN, CELL_GAS_FERTILITYAGEMIN_MAX)
-                self.fertilityAgeMax = random.uniform(CELL_GAS_FERTILITYAGEMAX_MIN, CELL_GAS_FERTILITYAGEMAX_MAX)
-                self.fertilityEnergy = random.uniform(CELL_GAS_FERTILITYENERGY_MIN, CELL_GAS_FERTILITYENERGY_MAX)
-                self.mass = random.uniform(CELL_GAS_MASS_MIN, CELL_GAS_MASS_MAX)
-                self.height = random.uniform(CELL_GAS_HEIGHT_MIN, CELL_GAS_HEIGHT_MAX)
-                self.prefHeight = random.uniform(CELL_GAS_PREFHEIGHT_MIN, CELL_GAS_PREFHEIGHT_MAX)
-                self.lightStorage = random.uniform (CELL_GAS_LIGHTSTORAGE_MIN, CELL_GAS_LIGHTSTORAGE_MAX)
-                self.energyStorage = random.uniform(CELL_GAS_ENERGYSTORAGE_MIN, CELL_GAS_ENERGYSTORAGE_MAX)
-                self.inertStorage = random.uniform(CELL_GAS_INERTSTORAGE_MIN, CELL_GAS_INERTSTORAGE_MAX)
-                self.color = random.uniform(CELL_GAS_COLOR_MIN, CELL_GAS_COLOR_MIN)
-            case CellState.LIQUID:
-                self.growthRate = random.uniform(CELL_LIQUID_GROWTHRATE_MIN, CELL_LIQUID_GROWTHRATE_MAX)
-                self.resilience = random.uniform(CELL_LIQUID_RESILIENCE_MIN, CELL_LIQUID_RESILIENCE_MAX)
-                self.perception = random.uniform(CELL_LIQUID_PERCEPTION_MIN, CELL_LIQUID_PERCEPTION_MAX)
-                self.speed = random.uniform(CELL_LIQUID_SPEED_MIN, CELL_LIQUID_SPEED_MAX)
-                self.lightEmission = random.uniform(CELL_LIQUID_LIGHTEMISSION_MIN, CELL_LIQUID_LIGHTEMISSION_MAX)
-                self.lightAbsorption = random.uniform(CELL_LIQUID_LIGHTABSORPTION_MIN, CELL_LIQUID_LIGHTABSORPTION_MAX)
-                self.inertEmission = random.uniform(CELL_LIQUID_INERTEMISSION_MIN, CELL_LIQUID_INERTEMISSION_MAX)
-                self.inertAbsorption = random.uniform(CELL_LIQUID_INERTABSORPTION_MIN, CELL_LIQUID_INERTABSORPTION_MAX)
-                self.mutationRate = random.uniform(CELL_LIQUID_MUTATIONRATE_MIN, CELL_LIQUID_MUTATIONRATE_MAX)
-                self.lifeExpectancyMin = random.uniform(CELL_LIQUID_LIFEEXPECTANCYMIN_MIN, CELL_LIQUID_LIFEEXPECTANCYMIN_MAX)
-                self.lifeExpectancyMax = random.uniform(CELL_LIQUID_LIFEEXPECTANCYMAX_MIN, CELL_LIQUID_LIFEEXPECTANCYMAX_MAX)
-                self.lifeExpectancy = random.uniform(self.lifeExpectancyMin, self.lifeExpectancyMax)
-                self.fertilityRate = random.uniform(CELL_LIQUID_FERTILITYRATE_MIN, CELL_LIQUID_FERTILITYRATE_MAX)
-                self.fertilityAgeMin = random.uniform(CELL_LIQUID_FERTILITYAGEMIN_MIN, CELL_LIQUID_FERTILITYAGEMIN_MAX)
-                self.fertilityAgeMax = random.uniform(CELL_LIQUID_FERTILITYAGEMAX_MIN, CELL_LIQUID_FERTILITYAGEMAX_MAX)
-                self.fertilityEnergy = random.uniform(CELL_LIQUID_FERTILITYENERGY_MIN, CELL_LIQUID_FERTILITYENERGY_MAX)
-                self.mass = random.uniform(CELL_LIQUID_MASS_MIN, CELL_LIQUID_MASS_MAX)
-                self.height = random.uniform(CELL_LIQUID_HEIGHT_MIN, CELL_LIQUID_HEIGHT_MAX)
-                self.prefHeight = random.uniform(CELL_LIQUID_PREFHEIGHT_MIN, CELL_LIQUID_PREFHEIGHT_MAX)
-                self.lightStorage = random.uniform (CELL_LIQUID_LIGHTSTORAGE_MIN, CELL_LIQUID_LIGHTSTORAGE_MAX)
-                self.energyStorage = random.uniform(CELL_LIQUID_ENERGYSTORAGE_MIN, CELL_LIQUID_ENERGYSTORAGE_MAX)
-                self.inertStorage = random.uniform(CELL_LIQUID_INERTSTORAGE_MIN, CELL_LIQUID_INERTSTORAGE_MAX)
-                self.color = random.uniform(CELL_LIQUID_COLOR_MIN, CELL_LIQUID_COLOR_MIN)
-            case CellState.MESOPHASE:
-                self.growthRate = random.uniform(CELL_MESOPHASE_GROWTHRATE_MIN, CELL_MESOPHASE_GROWTHRATE_MAX)
-                self.resilience = random.uniform(CELL_MESOPHASE_RESILIENCE_MIN, CELL_MESOPHASE_RESILIENCE_MAX)
-                self.perception = random.uniform(CELL_MESOPHASE_PERCEPTION_MIN, CELL_MESOPHASE_PERCEPTION_MAX)
-                self.speed = random.uniform(CELL_MESOPHASE_SPEED_MIN, CELL_MESOPHASE_SPEED_MAX)
-                self.lightEmission = random.uniform(CELL_MESOPHASE_LIGHTEMISSION_MIN, CELL_MESOPHASE_LIGHTEMISSION_MAX)
-                self.lightAbsorption = random.uniform(CELL_MESOPHASE_LIGHTABSORPTION_MIN, CELL_MESOPHASE_LIGHTABSORPTION_MAX)
-                self.inertEmission = random.uniform(CELL_MESOPHASE_INERTEMISSION_MIN, CELL_MESOPHASE_INERTEMISSION_MAX)
-                self.inertAbsorption = random.uniform(CELL_MESOPHASE_INERTABSORPTION_MIN, CELL_MESOPHASE_INERTABSORPTION_MAX)
-                self.mutationRate = random.uniform(CELL_MESOPHASE_MUTATIONRATE_MIN, CELL_MESOPHASE_MUTATIONRATE_MAX)
-                self.lifeExpectancyMin = random.uniform(CELL_MESOPHASE_LIFEEXPECTANCYMIN_MIN, CELL_MESOPHASE_LIFEEXPECTANCYMIN_MAX)
-                self.lifeExpectancyMax = random.uniform(CELL_MESOPHASE_LIFEEXPECTANCYMAX_MIN, CELL_MESOPHASE_LIFEEXPECTANCYMAX_MAX)
-                self.lifeExpectancy = random.uniform(self.lifeExpectancyMin, self.lifeExpectancyMax)
-                self.fertilityRate = random.uniform(CELL_MESOPHASE_FERTILITYRATE_MIN, CELL_MESOPHASE_FERTILITYRATE_MAX)
-                self.fertilityAgeMin = random.uniform(CELL_MESOPHASE_FERTILITYAGEMIN_MIN, CELL_MESOPHASE_FERTILITYAGEMIN_MAX)
-                self.fertilityAgeMax = random.uniform(CELL_MESOPHASE_FERTILITYAGEMAX_MIN, CELL_MESOPHASE_FERTILITYAGEMAX_MAX)
-                self.fertilityEnergy = random.uniform(CELL_MESOPHASE_FERTILITYENERGY_MIN, CELL_MESOPHASE_FERTILITYENERGY_MAX)
-                self.mass = random.uniform(CELL_MESOPHASE_MASS_MIN, CELL_MESOPHASE_MASS_MAX)
-                self.height = random.uniform(CELL_MESOPHASE_HEIGHT_MIN, CELL_MESOPHASE_HEIGHT_MAX)
-                self.prefHeight = random.uniform(CELL_MESOPHASE_PREFHEIGHT_MIN, CELL_MESOPHASE_PREFHEIGHT_MAX)
-                self.lightStorage = random.uniform (CELL_MESOPHASE_LIGHTSTORAGE_MIN, CELL_MESOPHASE_LIGHTSTORAGE_MAX)
-                self.energyStorage = random.uniform(CELL_MESOPHASE_ENERGYSTORAGE_MIN, CELL_MESOPHASE_ENERGYSTORAGE_MAX)
-                self.inertStorage = random.uniform(CELL_MESOPHASE_INERTSTORAGE_MIN, CELL_MESOPHASE_INERTSTORAGE_MAX)
-                self.color = random.uniform(CELL_MESOPHASE_COLOR_MIN, CELL_MESOPHASE_COLOR_MIN)
-            case CellState.SOLID: # CRYSTALLINE
-                self.growthRate = random.uniform(CELL_SOLID_GROWTHRATE_MIN, CELL_SOLID_GROWTHRATE_MAX)
-                self.resilience = random.uniform(CELL_SOLID_RESILIENCE_MIN, CELL_SOLID_RESILIENCE_MAX)
-                self.perception = random.uniform(CELL_SOLID_PERCEPTION_MIN, CELL_SOLID_PERCEPTION_MAX)
-                self.speed = random.uniform(CELL_SOLID_SPEED_MIN, CELL_SOLID_SPEED_MAX)
-                self.lightEmission = random.uniform(CELL_SOLID_LIGHTEMISSION_MIN, CELL_SOLID_LIGHTEMISSION_MAX)
-                self.lightAbsorption = random.uniform(CELL_SOLID_LIGHTABSORPTION_MIN, CELL_SOLID_LIGHTABSORPTION_MAX)
-                self.inertEmission = random.uniform(CELL_SOLID_INERTEMISSION_MIN, CELL_SOLID_INERTEMISSION_MAX)
-                self.inertAbsorption = random.uniform(CELL_SOLID_INERTABSORPTION_MIN, CELL_SOLID_INERTABSORPTION_MAX)
-                self.mutationRate = random.uniform(CELL_SOLID_MUTATIONRATE_MIN, CELL_SOLID_MUTATIONRATE_MAX)
-                self.lifeExpectancyMin = random.uniform(CELL_SOLID_LIFEEXPECTANCYMIN_MIN, CELL_SOLID_LIFEEXPECTANCYMIN_MAX)
-                self.lifeExpectancyMax = random.uniform(CELL_SOLID_LIFEEXPECTANCYMAX_MIN, CELL_SOLID_LIFEEXPECTANCYMAX_MAX)
-                self.lifeExpectancy = random.uniform(self.lifeExpectancyMin, self.lifeExpectancyMax)
-                self.fertilityRate = random.uniform(CELL_SOLID_FERTILITYRATE_MIN, CELL_SOLID_FERTILITYRATE_MAX)
-                self.fertilityAgeMin = random.uniform(CELL_SOLID_FERTILITYAGEMIN_MIN, CELL_SOLID_FERTILITYAGEMIN_MAX)
-                self.fertilityAgeMax = random.uniform(CELL_SOLID_FERTILITYAGEMAX_MIN, CELL_SOLID_FERTILITYAGEMAX_MAX)
-                self.fertilityEnergy = random.uniform(CELL_SOLID_FERTILITYENERGY_MIN, CELL_SOLID_FERTILITYENERGY_MAX)
-                self.mass = random.uniform(CELL_SOLID_MASS_MIN, CELL_SOLID_MASS_MAX)
-                self.height = random.uniform(CELL_SOLID_HEIGHT_MIN, CELL_SOLID_HEIGHT_MAX)
-                self.prefHeight = random.uniform(CELL_SOLID_PREFHEIGHT_MIN, CELL_SOLID_PREFHEIGHT_MAX)
-                self.lightStorage = random.uniform (CELL_SOLID_LIGHTSTORAGE_MIN, CELL_SOLID_LIGHTSTORAGE_MAX)
-                self.energyStorage = random.uniform(CELL_SOLID_ENERGYSTORAGE_MIN, CELL_SOLID_ENERGYSTORAGE_MAX)
-                self.inertStorage = random.uniform(CELL_SOLID_INERTSTORAGE_MIN, CELL_SOLID_INERTSTORAGE_MAX)
-                self.color = random.uniform(CELL_SOLID_COLOR_MIN, CELL_SOLID_COLOR_MIN)
-            case CellState.INERT:
-                self.growthRate = random.uniform(CELL_INERT_GROWTHRATE_MIN, CELL_INERT_GROWTHRATE_MAX)
-                self.resilience = random.uniform(CELL_INERT_RESILIENCE_MIN, CELL_INERT_RESILIENCE_MAX)
-                self.perception = random.uniform(CELL_INERT_PERCEPTION_MIN, CELL_INERT_PERCEPTION_MAX)
-                self.speed = random.uniform(CELL_INERT_SPEED_MIN, CELL_INERT_SPEED_MAX)
-                self.lightEmission = random.uniform(CELL_INERT_LIGHTEMISSION_MIN, CELL_INERT_LIGHTEMISSION_MAX)
-                self.lightAbsorption = random.uniform(CELL_INERT_LIGHTABSORPTION_MIN, CELL_INERT_LIGHTABSORPTION_MAX)
-                self.inertEmission = random.uniform(CELL_INERT_INERTEMISSION_MIN, CELL_INERT_INERTEMISSION_MAX)
-                self.inertAbsorption = random.uniform(CELL_INERT_INERTABSORPTION_MIN, CELL_INERT_INERTABSORPTION_MAX)
-                self.mutationRate = random.uniform(CELL_INERT_MUTATIONRATE_MIN, CELL_INERT_MUTATIONRATE_MAX)
-                self.lifeExpectancyMin = random.uniform(CELL_INERT_LIFEEXPECTANCYMIN_MIN, CELL_INERT_LIFEEXPECTANCYMIN_MAX)
-                self.lifeExpectancyMax = random.uniform(CELL_INERT_LIFEEXPECTANCYMAX_MIN, CELL_INERT_LIFEEXPECTANCYMAX_MAX)
-                self.lifeExpectancy = random.uniform(self.lifeExpectancyMin, self.lifeExpectancyMax)
-                self.fertilityRate = random.uniform(CELL_INERT_FERTILITYRATE_MIN, CELL_INERT_FERTILITYRATE_MAX)
-                self.fertilityAgeMin = random.uniform(CELL_INERT_FERTILITYAGEMIN_MIN, CELL_INERT_FERTILITYAGEMIN_MAX)
-                self.fertilityAgeMax = random.uniform(CELL_INERT_FERTILITYAGEMAX_MIN, CELL_INERT_FERTILITYAGEMAX_MAX)
-                self.fertilityEnergy = random.uniform(CELL_INERT_FERTILITYENERGY_MIN, CELL_INERT_FERTILITYENERGY_MAX)
-                self.mass = random.uniform(CELL_INERT_MASS_MIN, CELL_INERT_MASS_MAX)
-                self.height = random.uniform(CELL_INERT_HEIGHT_MIN, CELL_INERT_HEIGHT_MAX)
-                self.prefHeight = random.uniform(CELL_INERT_PREFHEIGHT_MIN, CELL_INERT_PREFHEIGHT_MAX)
-                self.lightStorage = random.uniform (CELL_INERT_LIGHTSTORAGE_MIN, CELL_INERT_LIGHTSTORAGE_MAX)
-                self.energyStorage = random.uniform(CELL_INERT_ENERGYSTORAGE_MIN, CELL_INERT_ENERGYSTORAGE_MAX)
-                self.inertStorage = random.uniform(CELL_INERT_INERTSTORAGE_MIN, CELL_INERT_INERTSTORAGE_MAX)
-                self.color = random.uniform(CELL_INERT_COLOR_MIN, CELL_INERT_COLOR_MIN)
-            case _:
-                self.growthRate = random.uniform(CELL_BASE_GROWTHRATE_MIN, CELL_BASE_GROWTHRATE_MAX)
-                self.resilience = random.uniform(CELL_BASE_RESILIENCE_MIN, CELL_BASE_RESILIENCE_MAX)
-                self.perception = random.uniform(CELL_BASE_PERCEPTION_MIN, CELL_BASE_PERCEPTION_MAX)
-                self.speed = random.uniform(CELL_BASE_SPEED_MIN, CELL_BASE_SPEED_MAX)
-                self.lightEmission = random.uniform(CELL_BASE_LIGHTEMISSION_MIN, CELL_BASE_LIGHTEMISSION_MAX)
-                self.lightAbsorption = random.uniform(CELL_BASE_LIGHTABSORPTION_MIN, CELL_BASE_LIGHTABSORPTION_MAX)
-                self.inertEmission = random.uniform(CELL_BASE_INERTEMISSION_MIN, CELL_BASE_INERTEMISSION_MAX)
-                self.inertAbsorption = random.uniform(CELL_BASE_INERTABSORPTION_MIN, CELL_BASE_INERTABSORPTION_MAX)
-                self.mutationRate = random.uniform(CELL_BASE_MUTATIONRATE_MIN, CELL_BASE_MUTATIONRATE_MAX)
-                self.lifeExpectancyMin = random.uniform(CELL_BASE_LIFEEXPECTANCYMIN_MIN, CELL_BASE_LIFEEXPECTANCYMIN_MAX)
-                self.lifeExpectancyMax = random.uniform(CELL_BASE_LIFEEXPECTANCYMAX_MIN, CELL_BASE_LIFEEXPECTANCYMAX_MAX)
-                self.lifeExpectancy = random.uniform(self.lifeExpectancyMin, self.lifeExpectancyMax)
-                self.fertilityRate = random.uniform(CELL_BASE_FERTILITYRATE_MIN, CELL_BASE_FERTILITYRATE_MAX)
-                self.fertilityAgeMin = random.uniform(CELL_BASE_FERTILITYAGEMIN_MIN, CELL_BASE_FERTILITYAGEMIN_MAX)
-                self.fertilityAgeMax = random.uniform(CELL_BASE_FERTILITYAGEMAX_MIN, CELL_BASE_FERTILITYAGEMAX_MAX)
-                self.fertilityEnergy = random.uniform(CELL_BASE_FERTILITYENERGY_MIN, CELL_BASE_FERTILITYENERGY_MAX)
-                self.mass = random.uniform(CELL_BASE_MASS_MIN, CELL_BASE_MASS_MAX)
-                self.prefHeight = random.uniform(CELL_BASE_PREFHEIGHT_MIN, CELL_BASE_PREFHEIGHT_MAX)
-                self.height = random.uniform(CELL_BASE_HEIGHT_MIN, CELL_BASE_HEIGHT_MAX)
-                self.lightStorage = random.uniform (CELL_BASE_LIGHTSTORAGE_MIN, CELL_BASE_LIGHTSTORAGE_MAX)
-                self.energyStorage = random.uniform(CELL_BASE_ENERGYSTORAGE_MIN, CELL_BASE_ENERGYSTORAGE_MAX)
-                self.inertStorage = random.uniform(CELL_BASE_INERTSTORAGE_MIN, CELL_BASE_INERTSTORAGE_MAX)
-                self.color = random.uniform(CELL_BASE_COLOR_MIN, CELL_BASE_COLOR_MIN)
-
-        if self.fertilityAgeMin > self.fertilityAgeMax:
-            self.fertilityAgeMin, self.fertilityAgeMax = self.fertilityAgeMax, self.fertilityAgeMin
-
-        if self.lifeExpectancyMin > self.lifeExpectancyMax:
-            self.lifeExpectancyMin, self.lifeExpectancyMax = self.lifeExpectancyMax, self.lifeExpectancyMin
+        self.population.spawnNew(np.array([self.slot]), self.stats)
     
     def spawnChild(self, parent):
-        self.turnCount = parent.turnCount - 1 # Set it as eligible for a turn, i guess
-        self.energy = random.uniform(CELL_BASE_ENERGY_MIN, CELL_BASE_ENERGY_MAX)
-        if self.energy > (parent.energy*0.5):
-            self.energy = (self.energy + (parent.energy-(parent.energy/CELL_REPRODUCTION_SUCCESS_COST)) / 2)
-        self.phaseTransition()
-
-        match self.state:
-            case CellState.PLASMA:
-                self.mutationRate = (random.uniform(CELL_PLASMA_MUTATIONRATE_MIN, CELL_PLASMA_MUTATIONRATE_MAX) + parent.mutationRate) / 2
-                self.color = (random.uniform(CELL_PLASMA_COLOR_MIN, CELL_PLASMA_COLOR_MAX) + parent.color) / 2
-            case CellState.GAS:
-                self.mutationRate = (random.uniform(CELL_GAS_MUTATIONRATE_MIN, CELL_GAS_MUTATIONRATE_MAX) + parent.mutationRate) / 2
-                self.color = (random.uniform(CELL_GAS_COLOR_MIN, CELL_GAS_COLOR_MAX) + parent.color) / 2
-            case CellState.LIQUID:
-                self.mutationRate = (random.uniform(CELL_LIQUID_MUTATIONRATE_MIN, CELL_LIQUID_MUTATIONRATE_MAX) + parent.mutationRate) / 2
-                self.color = (random.uniform(CELL_LIQUID_COLOR_MIN, CELL_LIQUID_COLOR_MAX) + parent.color) / 2
-            case CellState.MESOPHASE:
-                self.mutationRate = (random.uniform(CELL_MESOPHASE_MUTATIONRATE_MIN, CELL_MESOPHASE_MUTATIONRATE_MAX) + parent.mutationRate) / 2
-                self.color = (random.uniform(CELL_MESOPHASE_COLOR_MIN, CELL_MESOPHASE_COLOR_MAX) + parent.color) / 2
-            case CellState.SOLID:
-                self.mutationRate = (random.uniform(CELL_SOLID_MUTATIONRATE_MIN, CELL_SOLID_MUTATIONRATE_MAX) + parent.mutationRate) / 2
-                self.color = (random.uniform(CELL_SOLID_COLOR_MIN, CELL_SOLID_COLOR_MAX) + parent.color) / 2
-            case CellState.INERT:
-                self.mutationRate = (random.uniform(CELL_INERT_MUTATIONRATE_MIN, CELL_INERT_MUTATIONRATE_MAX) + parent.mutationRate) / 2
-                self.color = (random.uniform(CELL_INERT_COLOR_MIN, CELL_INERT_COLOR_MAX) + parent.color) / 2
-            case _:
-                self.mutationRate = (random.uniform(CELL_BASE_MUTATIONRATE_MIN, CELL_BASE_MUTATIONRATE_MAX) + parent.mutationRate) / 2
-                self.color = (random.uniform(CELL_BASE_COLOR_MIN, CELL_BASE_COLOR_MAX) + parent.color) / 2
-                self.stats.addCellStateChange("???")
-
-        self.mutateProp(self.generalStatsList)
-        self.normalizeProps(self.generalStatsList)
-
-        self.role = random.choice([parent.role, random.choice(CELL_ROLES)])
-        self.lifeExpectancy = random.uniform(self.lifeExpectancyMin, self.lifeExpectancyMax)
-
-        self.luck += (parent.luck/(80+parent.age)) * self.mutationRate # Get a bit of luck from your parent
-        self.height = self.height/2 # they DO also wanna mutate, cause mutate then lost 50% parent height
-        self.mass = self.mass/2
-
+        self.population.spawnChildren(np.array([self.slot]), np.array([parent.slot]), self.stats)
+        rng = SimulationRandom().random("reproduction")
+        self.role = rng.choice([parent.role, rng.choice(CELL_ROLES)])
+
+    # Push this cell along direction, with the row of cells ahead of it. The row is read from the occupancy grid
+    # in one scan and resolved without recursion: it ends at the first cell that escapes to a free square or gets
+    # squished against a cell more than twice as resilient, then every cell behind it moves one square forward,
+    # front to back. A row longer than CELL_PUSH_CHAIN_MAX doesn't budge.
     def moveOrSquish(self, moving, direction):
         dx, dy = direction
-        new_x = (self.x + dx) % self.environment.grid.shape[0]
-        new_y = (self.y + dy) % self.environment.grid.shape[1]
-        # Use signalGrid for perception-based movement
-        signal_at_target = self.environment.signalGrid[new_x, new_y]
-        #print(f"moveOrSquish called by Cell {self.id} targeting ({new_x}, {new_y}), signal: {signal_at_target}")  # Debug
-
-        # Found an empty space
-        # PUSH
-        if self.environment.canAddCellAt(new_x, new_y):
-            self.environment.moveCellTo(new_x, new_y, self)
-            #print(f"Escaped a death squish! Ran to signal {signal_at_target}")
-            self.stats.addCellDeathEscape()
-            self.stats.addCellMove()
-            self.luck += 1
-            self.fertilityRate -= 1
-            self.resilience += self.turnRoll * self.resilience
-            self.energy -= self.turnRollAlt * self.energy
-            self.memory.append((self.turnCount, "Escaped a death squish!", signal_at_target))
-            if not self.alive: # if cell is already inert and needs to move, update inertGrid
-                self.environment.addInertAt(self.x, self.y, (self.tightTurnRoll * CELL_DEATH_RELEASE_INERT))
-            return True
+        width, height = self.environment.grid.shape
+        steps = np.arange(1, CELL_PUSH_CHAIN_MAX + 1)
+        ahead = self.environment.grid[(self.x + dx * steps) % width, (self.y + dy * steps) % height]
+        wrapped = np.flatnonzero(ahead == self.slot) # a row going all around the grid pushes itself
+        if len(wrapped):
+            ahead = ahead[:wrapped[0]]
+        free = np.flatnonzero(ahead == EMPTY_SLOT)
+        chain = np.concatenate(([self.slot], ahead[:free[0]] if len(free) else ahead))
+        resilience = self.population.resilience[chain]
+        squished = np.flatnonzero(resilience[1:] > resilience[:-1] * 2)
+
+        if len(squished):
+            front = int(squished[0])
+        elif len(free):
+            front = len(chain) - 1
+        else:
+            self.stats.addCellPushStuck()
+            self.remember("Too crowded to budge", len(chain))
+            return False
+        self.stats.addPushChain(front + 1)
 
-        cell = self.environment.getCellAt(new_x, new_y)
-        if isinstance(cell, Cell):
-            #if cell.speed < (self.speed):
-            #print(f"Cell {self.id} collided with Cell {cell.id} at ({new_x}, {new_y})")  # Debug
+        cells = [self.population.cells[slot] for slot in chain[:front + 2]]
+        if len(squished):
+            cells[front].squish(cells[front + 1], cells[front - 1] if front else moving)
+        else:
+            cells[front].escapeSquish(direction)
+        for cell in reversed(cells[:front]):
+            cell.bounce(direction)
+        return front > 0 or not len(squished)
+
+    # Front of a push row with a free square ahead
+    def escapeSquish(self, direction):
+        new_x, new_y = self.environment._boundXY((self.x + direction[0], self.y + direction[1]))
+        signal_at_target = self.environment.signalGrid[new_x, new_y]
+        self.environment.moveCellTo(new_x, new_y, self)
+        #print(f"Escaped a death squish! Ran to signal {signal_at_target}")
+        self.stats.addCellDeathEscape()
+        self.stats.addCellMove()
+        self.luck += 1
+        self.fertilityRate -= 1
+        self.resilience += self.turnRoll * self.resilience
+        self.energy -= self.turnRollAlt * self.energy
+        self.remember("Escaped a death squish!", signal_at_target)
+        if not self.alive: # if cell is already inert and needs to move, update inertGrid
+            self.environment.addInertAt(self.x, self.y, (self.tightTurnRoll * CELL_DEATH_RELEASE_INERT))
+
+    # Front of a push row, caught between the cell pushing it (moving) and a much tougher cell
+    def squish(self, cell, moving):
+        #print(f"Cell {self.id} squished by Cell {cell.id}")  # Debug
+        # the target cell get squished
+        ratio = SimulationRandom().random("movement").uniform(CELL_DEATH_RELEASE_SQUISH_MIN, CELL_DEATH_RELEASE_SQUISH_MAX)
+        squishEnergyTransfer = self.energy * ratio/2 # Squish release of energy (norty?!)
+        cell.energy += squishEnergyTransfer
+        moving.energy += squishEnergyTransfer
+        if self.alive:
+            SimulationRecorder().recordDeath(self)
+        self.alive = False
+        self.environment.removeCellFromGrid(self)
+        #print(f"Died from cuddles. Energy: {self.energy}, lost {squishEnergyTransfer} this turn")
+        self.remember("Died from cuddles", squishEnergyTransfer)
+        self.stats.addCellDeath(CELL_DEATH_REASON_SQUISH)
+        self.environment.addInertAt(self.x, self.y, (SimulationRandom().random("movement").uniform(CELL_DEATH_RELEASE_SQUISH_MIN, CELL_DEATH_RELEASE_SQUISH_MIN)))
+        self.stats.addCellDisintegrationDeath()
+
+    # Cell of a push row following the one ahead of it
+    def bounce(self, direction):
+        new_x, new_y = self.environment._boundXY((self.x + direction[0], self.y + direction[1]))
+        signal_at_target = self.environment.signalGrid[new_x, new_y]
+        self.environment.moveCellTo(new_x, new_y, self)
+        #print(f"The Vengabus is Evolving O.o at signal {signal_at_target}")
+        self.stats.addCellPush()
+        self.stats.addCellMove()
+        self.remember("The Vengabus is Evolving O.o at signal {} (Move Bounced)", signal_at_target)
+        self.luck += 2
+        if not self.alive:
+            self.environment.addInertAt(self.x, self.y, CELL_DEATH_RELEASE_INERT)
 
-            if cell.resilience > (self.resilience*2):
-                #print(f"Cell {self.id} squished by Cell {cell.id}")  # Debug
-                # the target cell get squished
-                ratio = random.uniform(CELL_DEATH_RELEASE_SQUISH_MIN, CELL_DEATH_RELEASE_SQUISH_MAX)
-                squishEnergyTransfer = self.energy * ratio/2 # Squish release of energy (norty?!)
-                cell.energy += squishEnergyTransfer
-                moving.energy += squishEnergyTransfer
-                self.alive = False
-                self.environment.removeCellFromGrid(self)
-                #print(f"Died from cuddles. Energy: {self.energy}, lost {squishEnergyTransfer} this turn")
-                self.memory.append((self.turnCount, "Died from cuddles", squishEnergyTransfer))
-                self.stats.addCellDeath(CELL_DEATH_REASON_SQUISH)
-                self.environment.addInertAt(self.x, self.y, (random.uniform(CELL_DEATH_RELEASE_SQUISH_MIN, CELL_DEATH_RELEASE_SQUISH_MIN)))
-                self.stats.addCellDisintegrationDeath()
-                return False
-            
-            else:
-                # The destination cell attempts to move away
-                # DOUBLE++ PUSH
-                cell.moveOrSquish(self, direction)
-                if self.environment.canAddCellAt(new_x, new_y):
-                    self.environment.moveCellTo(new_x, new_y, self)
-                    #print(f"The Vengabus is Evolving O.o at signal {signal_at_target}")
-                    self.stats.addCellPush()
-                    self.stats.addCellMove()
-                    self.memory.append((self.turnCount, f"The Vengabus is Evolving O.o at signal {signal_at_target} (Move Bounced)", (new_x, new_y)))
-                    self.luck += 2
-                    if not self.alive:
-                        self.environment.addInertAt(self.x, self.y, CELL_DEATH_RELEASE_INERT)
-                return True
-                    
-        print(f"IDK WHAT'S HERE: {cell} at signal {signal_at_target}")
-        self.memory.append((self.turnCount, f"IDK WHAT'S HERE: {cell} at signal {signal_at_target}", signal_at_target))
-        return True
-        
     def move(self):
         if not self.alive or self.energy < CELL_MOVE_ENERGY_MIN:
-            self.memory.append((self.turnCount, "had a lie in today", self.energy))
+            self.remember("had a lie in today", self.energy)
             self.stats.addCellStop()
             # print(f"Not moving because alive is {self.alive} & energy is {self.energy}")
             return
         
         # Movement based on environmental signals and nutrient concentration
+        rng = SimulationRandom().random("movement")
         potentialMoves = [(0, 1), (1, 0), (0, -1), (-1, 0)]
-        random.shuffle(potentialMoves)
+        rng.shuffle(potentialMoves)
         blockCounter = 0
         maxMoveAttempts = 4
 
@@ -386,7 +230,7 @@ class Cell:
             maxSignal = -1
             #print(f"Cell {self.id} evaluating moves at ({self.x}, {self.y})")  # Debug
             if self.perception < CELL_BLINDLESS_LEVEL:
-                dx, dy = random.choice([-1,0,1]), random.choice([-1,0,1])
+                dx, dy = rng.choice([-1,0,1]), rng.choice([-1,0,1])
                 new_x = (self.x + dx) % self.environment.grid.shape[0]
                 new_y = (self.y + dy) % self.environment.grid.shape[1]
             else:
@@ -394,7 +238,7 @@ class Cell:
                     new_x = (self.x + dx) % self.environment.grid.shape[0]
                     new_y = (self.y + dy) % self.environment.grid.shape[1]
                     signal = self.environment.signalGrid[new_x, new_y]
-                    self.memory.append((self.turnCount, "Considered another direction", (dx, dy)))
+                    self.remember("Considered another direction")
                     #print(f"  Checking move to ({new_x}, {new_y}), signal: {signal}")  # Debug
                     if signal > maxSignal and self.environment.canAddCellAt(new_x, new_y):
                         # print(f"Best signal")
@@ -410,7 +254,7 @@ class Cell:
                     self.moveLoopCounter += 1
                     #print({self.moveLoopCounter})
                 if self.moveLoopCounter > 3:
-                    (dx), (dy) = random.choice(potentialMoves)
+                    (dx), (dy) = rng.choice(potentialMoves)
                     #print(f"reset move loop counter")
                     self.moveLoopCounter = 0
                     new_x = (self.x + dx) % self.environment.grid.shape[0]
@@ -424,38 +268,38 @@ class Cell:
                 self.environment.depleteInertAt(self.x,self.y,(self.environment.getInertAt(self.x, self.y)/100))
                 self.waterErosion(dx, dy)
                 self.stats.addCellMove()
-                self.memory.append((self.turnCount, f"Moved to signal {maxSignal}", (new_x, new_y)))
+                self.remember("Moved to signal {}", maxSignal)
                 break
             
             blockCounter += 1
             self.luck -= 0.2
             #print(f"Cell {self.id} blocked. Attempt {blockCounter}/{maxMoveAttempts}")  # Debug
-            self.memory.append((self.turnCount, f"You're really gonna block me {blockCounter} time(s)?", (self.x, self.y)))
+            self.remember("You're really gonna block me {:g} time(s)?", blockCounter)
 
             #print(f"Grid at ({new_x}, {new_y}): {type(self.environment.grid[new_x, new_y])}, value: {self.environment.grid[new_x, new_y]}")
-            if isinstance(self.environment.grid[new_x, new_y], Cell):
-                target_cell = self.environment.grid[new_x, new_y]
+            target_cell = self.environment.getCellAt(new_x, new_y)
+            if target_cell is not None:
                 if self.resilience > target_cell.resilience:
                     # Current cell has higher resilience, attempt to push the target away
-                    self.memory.append((self.turnCount, "Pushed weaker cell", (new_x, new_y)))
+                    self.remember("Pushed weaker cell")
                     target_cell.moveOrSquish(self, (dx, dy))
                     self.luck += 0.1
                     return
             else:
                 # Target cell is stronger
-                self.memory.append((self.turnCount, "Blocked by stronger cell", (new_x, new_y)))
+                self.remember("Blocked by stronger cell")
         else:
             # Handle non-cell cases (e.g., empty space, gas, or other markers)
-            self.memory.append((self.turnCount, f"No cell at ({new_x}, {new_y}) to compare resilience", (self.x, self.y)))
+            self.remember("No cell to compare resilience")
             self.luck += 0.1
         
         if self.x != new_x or self.y != new_y:
             #print(f"Failed moving {self.id} from ({self.x}, {self.y}) to ({new_x}, {new_y})")
-            self.memory.append((self.turnCount, "Move Failed", (new_x, new_y)))
+            self.remember("Move Failed")
                     
         else:
             #print(f"Failed moving {self.id} onto itself")
-            self.memory.append((self.turnCount, "Move Failed", (new_x, new_y)))
+            self.remember("Move Failed")
 
     def waterErosion(self, dx, dy):
         if self.state == CellState.LIQUID:
@@ -468,6 +312,7 @@ class Cell:
             self.environment.addInertAt(rightX,rightY,(self.inertUnderCell/10))
 
     def getCellColor(self):
+        from matplotlib.colors import hsv_to_rgb # only loaded once something draws the cells
         if self.organism:
             if self.organism.name: # sentient = random color picked once
                 if not hasattr(self.organism, "color"):
@@ -480,249 +325,60 @@ class Cell:
         else:
             return hsv_to_rgb((self.color, min(1, max(0.5, self.energy / (self.topEnergy))), min(1, max(0.8, self.energy / self.topEnergy))))
 
-    def absorbNutrients(self):
-        if self.alive:
-            envLightLevel = self.environment.getLightAt(self.x, self.y) #lightGrid[self.x, self.y]
-            lightAbsorbed = (envLightLevel/100) * self.lightAbsorption
-            if (lightAbsorbed + self.energy) > self.lightStorage:
-                self.environment.depleteLightAt(self.x, self.y, (lightAbsorbed * ENVIRONMENT_LIGHTABSORPTION_WASTE)/100)
-                self.memory.append((self.turnCount, "Light Reserves Full", lightAbsorbed))
-                self.luck = self.luckChoice() * 0.1
-                return
-            else:
-                self.energy += lightAbsorbed
-                self.environment.depleteLightAt(self.x, self.y, (lightAbsorbed * ENVIRONMENT_LIGHTABSORPTION_WASTE))
-                self.memory.append((self.turnCount, "Gained Light Energy", lightAbsorbed))
-                #print(f"Turn {self.turnCount}: Cell {self.id} gained {lightAbsorbed} energy. Total: {self.energy}")
-                # self.environment.lightGrid[self.x, self.y] = max(self.environment.lightGrid[self.x, self.y] - 0.02, 0)  # Deplete nutrients
-
-    def emitLight(self):
-        if self.state == CellState.PLASMA: # Plasma cells consistently emit high light
-            self.lightEmission += self.luckChance() * (self.lightEmission/50)
-            self.energy -= self.lightEmission
-            self.memory.append((self.turnCount, "Emitted light", (self.lightEmission)))
-        elif random.random() < 0.01 and self.energy > self.fertilityEnergy: # Non-plasma cells have a random chance to emit light
-            self.lightEmission += self.luckChance() * (self.lightEmission/100)
-            self.energy -= self.lightEmission
-            self.luck += 1
-            self.memory.append((self.turnCount, "Suddenly emitted light?!", self.lightEmission))
-        self.environment.addLightAt(self.x, self.y, self.lightEmission)
-            
     def waifuSignal(self):
         if self.alive:
             self.environment.addAttractivenessAt(self.x, self.y, self.attractiveness)
             # waifuGrid[self.x, self.y] = min(waifuGrid[self.x, self.y] + self.attractiveness, 100)
             vibes = self.environment.getAttractivenessAt(self.x, self.y) # waifuGrid[self.x, self.y]
             self.fertilityRate += self.luckChoice() * self.attractiveness/(200 * self.turnRoll)
-            self.memory.append((self.turnCount, "DAT ASS SUCH FERTILE", vibes))
+            self.remember("DAT ASS SUCH FERTILE", vibes)
         else:
             self.environment.setAttractivenessAt(self.x, self.y, 0)
             # waifuGrid[self.x, self.y] = 0
-            self.memory.append((self.turnCount, "Even my death turns people off!?", 0))
+            self.remember("Even my death turns people off!?", 0)
             
     # State of the cell: solid, liquid, gas, plasma, inert
     def phaseTransition(self):
-        if self.energy > CELL_PLASMA_ENERGY:
-            if not hasattr(self, "state") or self.state != CellState.PLASMA:
-                self.state = CellState.PLASMA
-                self.stats.addCellStateChange(CellState.PLASMA)
-                self.memory.append((self.turnCount, "Became Plasma"))
-            else:
-                self.stats.addCellStateStable()
-                self.memory.append((self.turnCount, "Still Plasma"))
-        elif CELL_GAS_ENERGY < self.energy <= CELL_PLASMA_ENERGY:
-            if not hasattr(self, "state") or self.state != CellState.GAS:
-                self.state = CellState.GAS
-                self.stats.addCellStateChange(CellState.GAS)
-                self.memory.append((self.turnCount, "Became Gas"))
-            else:
-                self.stats.addCellStateStable()
-                self.memory.append((self.turnCount, "Still Gas"))
-        elif CELL_LIQUID_ENERGY < self.energy <= CELL_GAS_ENERGY:
-            if not hasattr(self, "state") or self.state != CellState.LIQUID:
-                self.state = CellState.LIQUID
-                self.stats.addCellStateChange(CellState.LIQUID)
-                self.memory.append((self.turnCount, "Became Liquid", 0))
-            else:
-                self.stats.addCellStateStable()
-                self.memory.append((self.turnCount, "Still Liquid"))
-        elif CELL_MESOPHASE_ENERGY < self.energy <= CELL_LIQUID_ENERGY:
-            if not hasattr(self, "state") or self.state != CellState.MESOPHASE:
-                self.state = CellState.MESOPHASE
-                self.stats.addCellStateChange(CellState.MESOPHASE)
-                self.memory.append((self.turnCount, "Entered the Mesophase", 0))
-            else:
-                self.stats.addCellStateStable()
-                self.memory.append((self.turnCount, "Still Mesophase"))
-        elif CELL_SOLID_ENERGY < self.energy <= CELL_MESOPHASE_ENERGY:
-            if not hasattr(self, "state") or self.state != CellState.SOLID:
-                self.state = CellState.SOLID
-                self.stats.addCellStateChange(CellState.SOLID)
-                self.memory.append((self.turnCount, "Got Hard", 0))
-            else:
-                self.stats.addCellStateStable()
-                self.memory.append((self.turnCount, "Still Hard"))
-        elif CELL_INERT_ENERGY < self.energy <= CELL_SOLID_ENERGY:
-            if not hasattr(self, "state") or self.state != CellState.INERT:
-                self.state = CellState.INERT
-                self.stats.addCellStateChange(CellState.INERT)
-                self.memory.append((self.turnCount, "Became Inert", 0))
-            else:
-                self.stats.addCellStateStable()
-                self.memory.append((self.turnCount, "Still Inert"))
-
-    def reproduce(self):
-        if not self.alive:
-            return False
-        if self.age > self.fertilityAgeMax:
-            self.stats.addCellElderly()
-            self.resilience -= self.resilience/100
-            return False
-        if self.age < self.fertilityAgeMin:
-            self.stats.addCellYouth()
-            self.mass += (max(1, (max(self.growthRate, self.mutationRate))/max(1,(min(self.growthRate, self.mutationRate))))) * max(1,(self.mass/100))
-            self.memory.append((self.turnCount, "I'm just a kid!"))
-            return False
-        self.stats.addCellAdult()
-        if self.energy < self.fertilityEnergy:
-            self.stats.addCellBabyFailed("Exhausted")
-            self.memory.append((self.turnCount, "Too lazy to fuck"))
-            self.fertilityRate += 1
-            self.energyStorage += self.luckChoice()
-            return False
-        # reproducing a cell inside an organism (will be done in organism)
-        #if self.organism is not None:
-        #    return False
-        # Generate a baby cell if enough energy
-        if (self.turnRollAlt * 100) < self.fertilityRate or (self.attractiveness > ((self.CellAttractivenessTopRecord/10)*9)):
-            # TODO: Factor in Luck
-            if self.state == CellState.INERT: # inert cells 'birth' enrichment onto environment
-                enrichInert = self.mass/100 + 1
-                self.mass -= enrichInert
-                self.environment.addInertAt(self.x, self.y, (enrichInert * 0.2)) # 20% at self, 10% at each adjacent, 40% lost
-                self.environment.addInertAt(self.x + 1, self.y, (enrichInert * 0.1)) # Top
-                self.environment.addInertAt(self.x, self.y + 1, (enrichInert * 0.1)) # Right
-                self.environment.addInertAt(self.x - 1, self.y, (enrichInert * 0.1)) # Bottom
-                self.environment.addInertAt(self.x, self.y - 1, (enrichInert * 0.1)) # Left
-                self.stats.addCellDisintegration()
-                self.memory.append((self.turnCount, "Enriched the earth", (enrichInert * 0.6)))
-                if self.mass <= 0:
-                    # disappear from board
-                    self.mass = 0
-                    self.environment.removeCellFromGrid(self)
-                    self.stats.addCellDisintegrationDeath()
-                    self.memory.append((self.turnCount, "Oop bye"))
-            else: 
-                x, y = (self.x + random.choice([-1, 1])) % self.environment.grid.shape[0], (self.y + random.choice([-1, 1])) % self.environment.grid.shape[1]
-                if self.environment.canAddCellAt(x, y):  # Empty spot
-                    reproductionCost = (self.energy/CELL_REPRODUCTION_SUCCESS_COST)
-                    self.energy = reproductionCost
-                    self.energyStorage = self.energyStorage - reproductionCost/5
-                    baby_cell = Cell(x, y, self.stats, self.environment, organismCheck=self.organism, parent=self)
-                    self.environment.setCellAt(x, y, baby_cell)
-                    # print("UNEBEBEEEEEEEEEEEEEEEEE!!!!!!!!!!!!!!!!!!1!!!!!!!!!!!!!1!!!")
-                    if self.attractiveness < ((self.CellAttractivenessTopRecord/10)*9):
-                        self.memory.append((self.turnCount, "Wait, une bebe?! Where did this thing come from!?", self.fertilityRate))
-                        self.fertilityRate += self.luckChoice() * self.turnRollAlt
-                        self.stats.addCellBaby("Fertile")
-                        return True
-                    else:
-                        self.memory.append((self.turnCount, "Can't believe i'm finally a parent!", self.attractiveness))
-                        self.stats.addCellBaby("Attractive")
-                        self.fertilityRate += self.turnRoll
-                        return True
-                else:
-                    reproductionFailureCost = (self.energy/CELL_REPRODUCTION_FAILURE_COST)
-                    self.energy = reproductionFailureCost
-                    self.energyStorage = self.energyStorage - reproductionFailureCost/5
-                    # print("Tried to UNEBEBEBEBEBEBEBEE BUT NO SPACE LEFT")
-                    self.stats.addCellBabyFailed("Overpopulation")
-                    self.memory.append((self.turnCount, "Didn't have room for even 1 bebe :("))
-                    self.fertilityRate += self.turnRollAlt
-                    return False
-            return False
-
-    def decay(self):
-        if not self.alive:
+        state = classifyPhase(self.energy)
+        if state is None:
             return
-        self.energy -= self.turnRoll * (self.energy/CELL_DECAY_ENERGY_MULTIPLIER) + 1
-        self.age += self.turnRollAlt * CELL_DECAY_AGE_PER_TURN
-        self.growthRate -= self.turnRoll * (self.growthRate/self.growthDecayRate)
-        self.height += self.turnRollAlt * self.growthRate/100
-        self.lifeExpectancy += self.luckChoice()*(random.uniform(self.lifeExpectancyMin, self.lifeExpectancyMax)/100)
-        self.attractiveness = self.turnRoll * (((self.energy*CELL_ATTRACTIVENESS_NORM_ENERGY)+ \
-                                                            (self.age*CELL_ATTRACTIVENESS_NORM_AGE)+ \
-                                                            (self.growthRate*CELL_ATTRACTIVENESS_NORM_GROWTH)+ \
-                                                            (self.resilience*CELL_ATTRACTIVENESS_NORM_RESILIENCE)+ \
-                                                            (self.perception*CELL_ATTRACTIVENESS_NORM_STRENGTH)+ \
-                                                            (self.speed*CELL_ATTRACTIVENESS_NORM_SPEED)+ \
-                                                            (self.lightEmission*CELL_ATTRACTIVENESS_NORM_LIGHTEMISSION) + \
-                                                            (self.mutationRate*CELL_ATTRACTIVENESS_NORM_MUTATIONRATE) + \
-                                                            (self.lifeExpectancy*CELL_ATTRACTIVENESS_NORM_LIFE_EXPECTANCY) + \
-                                                            (self.mass*CELL_ATTRACTIVENESS_NORM_MASS) + \
-                                                            (self.height*CELL_ATTRACTIVENESS_NORM_HEIGHT)) / \
-                                                            (11*CELL_ATTRACTIVENESS_NORM_NORM))
-        if self.attractiveness > self.CellAttractivenessTopRecord:
-            self.CellAttractivenessTopRecord = self.attractiveness
-            self.lifeExpectancyMax += self.lifeExpectancyMax/100
-        if self.energy > self.energyStorage:
-            self.energy = self.energyStorage
-            self.energyStorage += 1
-        if self.energy >= self.cellEnergyRecord * self.turnRollAlt:
-            self.cellEnergyRecord = self.energy
-            self.topEnergyDecay = self.turnRoll * (self.energy/CELL_DECAY_EXCESS_ENERGY_MULTIPLIER)
-            self.energy -= self.topEnergyDecay
-            self.memory.append((self.turnCount, "Fuck, being this cool is too hard, I lost energy", self.topEnergyDecay))
-        #print(f"Rated {self.attractiveness}% hot")
-        self.memory.append((self.turnCount, f"I'm really rated {self.attractiveness} percent hot!?", self.attractiveness))
-        if (self.energy <= 0) or (self.age >= (self.turnRollAlt * self.lifeExpectancy)):  # Death by starvation or old age
-            self.alive = False
-            print(f"Died from state {self.state} Energy: {self.energy}, lost {(1 / self.resilience) * self.speed} this turn")
-            if self.age < self.lifeExpectancy:
-                self.stats.addCellDeath(CELL_DEATH_REASON_STARVATION)
-                self.memory.append((self.turnCount, "I got too tired", {"energy": self.energy, "age": self.age, "lifeExpectancy": self.lifeExpectancy}))
-            else:
-                self.stats.addCellDeath(CELL_DEATH_REASON_AGE)
-                self.memory.append((self.turnCount, "I got too old", {"energy": self.energy, "age": self.age, "lifeExpectancy": self.lifeExpectancy}))
-            #else:
-            #    self.stats.addCellDeath(CELL_DEATH_REASON_STARVATION)
+        if self.state != state:
+            self.state = state
+            self.stats.addCellStateChange(state)
+            self.remember(PHASE_MEMORIES[state][0])
+        else:
+            self.stats.addCellStateStable()
+            self.remember(PHASE_MEMORIES[state][1])
+
+    # Death by starvation or old age, the cell turns inert and stays on the board
+    # record=False when the death was already handed to SimulationRecorder with the others of the turn
+    def die(self, record=True):
+        self.alive = False
+        self.population.unschedule(self.slot)
+        SimulationLog().debug("cell.death", "Died from state {} Energy: {}, lost {} this turn", self.state, self.energy, (1 / self.resilience) * self.speed)
+        if self.age < self.lifeExpectancy:
+            self.stats.addCellDeath(CELL_DEATH_REASON_STARVATION)
+            self.remember("I got too tired", self.energy)
+        else:
+            self.stats.addCellDeath(CELL_DEATH_REASON_AGE)
+            self.remember("I got too old", self.age)
+        #else:
+        #    self.stats.addCellDeath(CELL_DEATH_REASON_STARVATION)
+        if record:
             SimulationRecorder().recordDeath(self)
-            self.mass = self.mass+max(0,self.energy)
-            self.energy = 0
-            self.resilience = self.resilience/(INERT_STONE_SOFTNESS/10)
-            self.state = CellState.INERT
-            self.environment.addInertAt(self.x, self.y, ((self.mass/100)*CELL_DEATH_RELEASE_INERT_MODIFIER))
-            self.mass = ((self.mass/100)*(100-CELL_DEATH_RELEASE_INERT_MODIFIER))
-            if self.lightEmission > self.lightEmission-1: # edit to make sense later lol
-                self.environment.addLightAt(self.x, self.y, self.lightEmission)
-            #lightGrid[self.x, self.y] += CELL_DEATH_RELEASE_LIGHT  # Dead cells release light for some reason
-            #inertGrid[self.x, self.y] += CELL_DEATH_RELEASE_INERT # Drop inert resources onto inert grid
-
-    def normalizeProps(self, props):
-            cellState = self.state.value.upper() #getattr(cell, CellState)
-            for propName in props:
-                cellPropVal = getattr(self, propName) # get the stats of the cell
-                stateNameMax = f"CELL_{cellState}_{propName.upper()}_MAX"
-                stateNameMin = f"CELL_{cellState}_{propName.upper()}_MIN"
-                stateMaxVal = globals()[stateNameMax] # get the base stats of an average cell of it's state
-                stateMinVal = globals()[stateNameMin]
-                if stateMinVal == 0 and cellPropVal < 0:
-                    cellPropVal = 0
-                    return
-                if cellPropVal > stateMaxVal:
-                    cellPropVal = (cellPropVal + stateMaxVal) / 2
-
-    def needTurn(self, turn):
-        return self.turnCount < turn
-    
-    def mutateProp(self, props):
-            for propName in props:
-                parentVal = getattr(self.parent, propName)
-                mutatedValue = parentVal + (self.luckChoice() * ((parentVal/100) * self.mutationRate))
-                setattr(self, propName, mutatedValue)
+        self.mass = self.mass+max(0,self.energy)
+        self.energy = 0
+        self.resilience = self.resilience/(INERT_STONE_SOFTNESS/10)
+        self.state = CellState.INERT
+        self.environment.addInertAt(self.x, self.y, ((self.mass/100)*CELL_DEATH_RELEASE_INERT_MODIFIER))
+        self.mass = ((self.mass/100)*(100-CELL_DEATH_RELEASE_INERT_MODIFIER))
+        if self.lightEmission > self.lightEmission-1: # edit to make sense later lol
+            self.environment.addLightAt(self.x, self.y, self.lightEmission)
+        #lightGrid[self.x, self.y] += CELL_DEATH_RELEASE_LIGHT  # Dead cells release light for some reason
+        #inertGrid[self.x, self.y] += CELL_DEATH_RELEASE_INERT # Drop inert resources onto inert grid
 
     def luckChoice(self):
-        return random.choices([-1, 1], k = 1, weights = [((self.luck + 100)/200), (1-((self.luck + 100)/200))])[0] # Luck (assuming scaled -100 to 100) and a random chance weight the + or - choice
+        return -1 if SimulationRandom().random("cells").random() < (self.luck + 100)/200 else 1 # Luck (assuming scaled -100 to 100) and a random chance weight the + or - choice
 
     def summarizeMemory(self):
         if self.alive == True:
@@ -733,19 +389,9 @@ class Cell:
 
             onDeathStats = (f"\n Hey, Cell {self.id} here. Just passing on my memoir... Died at: {self.age}, on turn {self.turnCount}, at {self.x},{self.y}. Cell role: {self.role}. Attractiveness: {self.attractiveness}. Growth Decay Rate: {self.growthDecayRate}. Luck: {self.luck}. Highest Energy: {self.cellEnergyRecord}. Energy: {self.energy}. Growth Rate: {self.growthRate}. Resilience: {self.resilience}. Perception Strength: {self.perception}. Speed: {self.speed}. Light Emission: {self.lightEmission}. Light Absorption: {self.lightAbsorption}. Mutation Rate: {self.mutationRate}. Life Expectancy: {self.lifeExpectancy}. Fertility Rate: {self.fertilityRate}. Fertility Age: {self.fertilityAgeMin} - {self.fertilityAgeMax}. Energy needed for reproduction: {self.fertilityEnergy}. Mass: {self.mass}. Height: {self.height}. color: {self.color}.")
             
-            #with open("birthDeathStats.txt", "a") as file: # a is append! :)
-                #file.write(onDeathStats + "\n")
-
-            #print(f"Cell {self.id} death written to birthDeathStats.txt successfully!")
+            SimulationRecorder().writeCertificate(onDeathStats)
 
-    def runLoop(self, turn):
-        self.turnCount = turn
-        self.getTurnInfo()
-        self.move()
-        self.absorbNutrients()
-        self.phaseTransition()
-        self.reproduce()
-        self.decay()
+    def endTurn(self):
         self.waifuSignal()
         self.summarizeMemory()
         if self.energy > self.topEnergy:
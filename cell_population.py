@@ -0,0 +1,434 @@
+# CELL POPULATION FILE: GAME OF WHY
+# CHARIS CAT 2024
+
+from bisect import bisect_left
+import numpy as np
+import config
+from config import *
+from simulation_random import SimulationRandom
+from genealogy import NO_PARENT
+
+# State codes stored in the "state" column, NO_STATE until the first phase transition
+CELL_STATES = tuple(CellState)
+CELL_STATE_CODES = {state: code for code, state in enumerate(CELL_STATES)}
+NO_STATE = -1
+
+# Phase transition boundaries: a cell with energy in (PHASE_ENERGY_BOUNDS[i-1], PHASE_ENERGY_BOUNDS[i]] is in
+# PHASE_STATES[i], energy above the last bound is plasma, and the state doesn't change at or below the first bound
+PHASE_ENERGY_BOUNDS = (CELL_INERT_ENERGY, CELL_SOLID_ENERGY, CELL_MESOPHASE_ENERGY, CELL_LIQUID_ENERGY, CELL_GAS_ENERGY, CELL_PLASMA_ENERGY)
+PHASE_STATES = (None, CellState.INERT, CellState.SOLID, CellState.MESOPHASE, CellState.LIQUID, CellState.GAS, CellState.PLASMA)
+PHASE_STATE_CODES = np.array([NO_STATE] + [CELL_STATE_CODES[state] for state in PHASE_STATES[1:]], dtype=np.int8)
+
+# Memory of a cell changing to / staying in each state
+PHASE_MEMORIES = {
+    CellState.PLASMA: ("Became Plasma", "Still Plasma"),
+    CellState.GAS: ("Became Gas", "Still Gas"),
+    CellState.LIQUID: ("Became Liquid", "Still Liquid"),
+    CellState.MESOPHASE: ("Entered the Mesophase", "Still Mesophase"),
+    CellState.SOLID: ("Got Hard", "Still Hard"),
+    CellState.INERT: ("Became Inert", "Still Inert"),
+}
+
+# Every event a cell can remember, stored in its memory as an index into this table with one float payload.
+# A "{}" field in an event stands for the payload, the other events show it as their detail (none when it is NaN)
+MEMORY_EVENTS = (
+    "had a lie in today", "Considered another direction", "Moved to signal {}", "You're really gonna block me {:g} time(s)?",
+    "Pushed weaker cell", "Blocked by stronger cell", "No cell to compare resilience", "Move Failed",
+    "Too crowded to budge", "Escaped a death squish!", "Died from cuddles",
+    "The Vengabus is Evolving O.o at signal {} (Move Bounced)", "Light Reserves Full", "Gained Light Energy",
+    "Emitted light", "Suddenly emitted light?!", "DAT ASS SUCH FERTILE", "Even my death turns people off!?",
+    *[memory for memories in PHASE_MEMORIES.values() for memory in memories],
+    "I'm just a kid!", "Too lazy to fuck", "Enriched the earth", "Oop bye",
+    "Wait, une bebe?! Where did this thing come from!?", "Can't believe i'm finally a parent!",
+    "Didn't have room for even 1 bebe :(", "Fuck, being this cool is too hard, I lost energy",
+    "I'm really rated {} percent hot!?", "I got too tired", "I got too old", "Blocked, I'll try again tomorrow",
+)
+MEMORY_EVENT_CODES = {event: code for code, event in enumerate(MEMORY_EVENTS)}
+# Events kept by each cell, none at all when the memory is turned off
+MEMORY_CAPACITY = CELL_MEMORY_CAPACITY if CELL_MEMORY_ENABLED else 0
+
+# Text and detail of a remembered event
+def describeMemory(code, payload):
+    event = MEMORY_EVENTS[code]
+    if "{" in event:
+        return event.format(payload), None
+    return event, None if np.isnan(payload) else payload
+
+def classifyPhase(energy):
+    return PHASE_STATES[bisect_left(PHASE_ENERGY_BOUNDS, energy)]
+
+# Traits drawn for every new cell within the bounds of its state, and the ones normalized against them
+SPAWN_TRAITS = ("growthRate", "resilience", "perception", "speed", "lightEmission", "lightAbsorption", "inertEmission",
+                "inertAbsorption", "mutationRate", "lifeExpectancyMin", "lifeExpectancyMax", "fertilityRate",
+                "fertilityAgeMin", "fertilityAgeMax", "fertilityEnergy", "mass", "height", "prefHeight", "lightStorage",
+                "energyStorage", "inertStorage", "color")
+TRAITS = SPAWN_TRAITS + ("growthDecayRate", "luck")
+# Traits a child gets from its parent, mutated, in the order they are mutated
+INHERITED_TRAITS = ("growthRate", "resilience", "perception", "speed", "lightEmission", "lightAbsorption", "inertEmission",
+                    "inertAbsorption", "lifeExpectancyMin", "lifeExpectancyMax", "fertilityRate", "fertilityAgeMin",
+                    "fertilityAgeMax", "fertilityEnergy", "mass", "height", "lightStorage", "energyStorage",
+                    "inertStorage", "mutationRate", "color", "growthDecayRate", "luck")
+TRAIT_INDEX = {trait: index for index, trait in enumerate(TRAITS)}
+MIN, MAX = 0, 1
+
+# Compile the CELL_{STATE}_{TRAIT}_MIN / _MAX settings into a (state x trait x {min, max}) table. Row i holds the
+# bounds of CELL_STATES[i] and the last row the CELL_BASE ones, so NO_STATE (-1) falls back to them.
+# A bound missing from the config doesn't bound anything (-inf / inf). Compiled by every population, as some bounds are
+# drawn from the seed of the run.
+def compileTraitBounds():
+    settings = vars(config)
+    bounds = np.empty((len(CELL_STATES) + 1, len(TRAITS), 2))
+    for row, stateName in enumerate([state.value.upper() for state in CELL_STATES] + ["BASE"]):
+        for column, trait in enumerate(TRAITS):
+            bounds[row, column, MIN] = settings.get(f"CELL_{stateName}_{trait.upper()}_MIN", -np.inf)
+            bounds[row, column, MAX] = settings.get(f"CELL_{stateName}_{trait.upper()}_MAX", np.inf)
+    return bounds
+
+# Value of an empty square in the environment's occupancy grid
+EMPTY_SLOT = -1
+
+class PopulationColumn:
+    """Cell attribute living in a CellPopulation column, at the slot of the cell"""
+    def __init__(self, column=None):
+        self.column = column
+
+    def __set_name__(self, owner, name):
+        if self.column is None:
+            self.column = name
+
+    def __get__(self, cell, owner=None):
+        if cell is None:
+            return self
+        return cell.population.__dict__[self.column][cell.slot]
+
+    def __set__(self, cell, value):
+        cell.population.__dict__[self.column][cell.slot] = value
+
+# CellPopulation keeps every cell's state in contiguous columns (one numpy array per trait) indexed by slot id
+class CellPopulation:
+    # column name: (dtype, value of a freshly allocated slot)
+    columnTypes = {
+        "occupied": (np.bool_, False),
+        "scheduled": (np.bool_, False),
+        "alive": (np.bool_, False),
+        "x": (np.int64, 0),
+        "y": (np.int64, 0),
+        "state": (np.int8, NO_STATE),
+        "turnCount": (np.int64, 0),
+        "parentId": (np.int64, NO_PARENT),
+        "prevX": (np.int64, 0),
+        "prevY": (np.int64, 0),
+        "moveLoopCounter": (np.int64, 0),
+        "energy": (np.float64, 0),
+        "age": (np.float64, 0),
+        "attractiveness": (np.float64, 0),
+        "cellEnergyRecord": (np.float64, 0),
+        "topEnergyDecay": (np.float64, 0),
+        "topEnergy": (np.float64, 1),
+        "attractivenessTopRecord": (np.float64, CELL_ATTRACTIVENESS_TOP_RECORD_INIT),
+        "turnRoll": (np.float64, 1),
+        "turnRollAlt": (np.float64, 1),
+        "tightTurnRoll": (np.float64, 1),
+        "inertUnderCell": (np.float64, 0),
+        "lifeExpectancy": (np.float64, 0),
+        "prefHeight": (np.float64, 0),
+        "growthRate": (np.float64, 0),
+        "resilience": (np.float64, 0),
+        "perception": (np.float64, 0),
+        "speed": (np.float64, 0),
+        "lightEmission": (np.float64, 0),
+        "lightAbsorption": (np.float64, 0),
+        "inertEmission": (np.float64, 0),
+        "inertAbsorption": (np.float64, 0),
+        "lifeExpectancyMin": (np.float64, 0),
+        "lifeExpectancyMax": (np.float64, 0),
+        "fertilityRate": (np.float64, 0),
+        "fertilityAgeMin": (np.float64, 0),
+        "fertilityAgeMax": (np.float64, 0),
+        "fertilityEnergy": (np.float64, 0),
+        "mass": (np.float64, 0),
+        "height": (np.float64, 0),
+        "lightStorage": (np.float64, 0),
+        "energyStorage": (np.float64, 0),
+        "inertStorage": (np.float64, 0),
+        "mutationRate": (np.float64, 0),
+        "color": (np.float64, 0),
+        "growthDecayRate": (np.float64, 0),
+        "luck": (np.float64, 0),
+        "memoryCount": (np.int64, 0),
+        "memoryTurn": (np.int32, 0),
+        "memoryEvent": (np.int16, 0),
+        "memoryPayload": (np.float64, np.nan),
+    }
+    # Shape of each slot's value in the columns that hold more than one: the memory is a ring of the
+    # MEMORY_CAPACITY last events of the cell, memoryCount being how many it remembered in total
+    columnShapes = {
+        "memoryTurn": (MEMORY_CAPACITY,),
+        "memoryEvent": (MEMORY_CAPACITY,),
+        "memoryPayload": (MEMORY_CAPACITY,),
+    }
+
+    def __init__(self, capacity=CELL_POPULATION_BASE_CAPACITY):
+        self.capacity = 0
+        self.size = 0 # slots [0, size) have been handed out at least once
+        self.cells = []
+        self.freeSlots = []
+        self.releasedSlots = []
+        self.traitBounds = compileTraitBounds()
+        self.grow(max(1, capacity))
+
+    def grow(self, capacity):
+        for column, (dtype, default) in self.columnTypes.items():
+            data = np.full((capacity,) + self.columnShapes.get(column, ()), default, dtype=dtype)
+            if self.capacity:
+                data[:self.capacity] = getattr(self, column)
+            setattr(self, column, data)
+        self.cells.extend([None] * (capacity - self.capacity))
+        self.capacity = capacity
+
+    # Hand out a slot for a new cell, every column starts at its default value
+    def allocate(self, cell):
+        if self.freeSlots:
+            slot = self.freeSlots.pop()
+        else:
+            if self.size == self.capacity:
+                self.grow(self.capacity * 2)
+            slot = self.size
+            self.size += 1
+        for column, (dtype, default) in self.columnTypes.items():
+            getattr(self, column)[slot] = default
+        self.occupied[slot] = True
+        self.cells[slot] = cell
+        return slot
+
+    # Give back the slot of a cell that left the world. It is only reused after recycleSlots(), so cell views
+    # still held elsewhere this turn (records, memoirs...) keep reading their own values until then
+    def release(self, slot):
+        self.occupied[slot] = False
+        self.scheduled[slot] = False
+        self.releasedSlots.append(slot)
+
+    def recycleSlots(self):
+        for slot in self.releasedSlots:
+            self.cells[slot] = None
+        self.freeSlots.extend(self.releasedSlots)
+        self.releasedSlots.clear()
+
+    def getCellState(self, slot):
+        code = self.state[slot]
+        return None if code == NO_STATE else CELL_STATES[code]
+
+    def setCellState(self, slot, state):
+        self.state[slot] = NO_STATE if state is None else CELL_STATE_CODES[state]
+
+    # Index of the living cells that get a turn: kept up to date on birth, death and removal from the grid
+    def schedule(self, slot):
+        self.scheduled[slot] = True
+
+    def unschedule(self, slot):
+        self.scheduled[slot] = False
+
+    # Scheduled slots in grid scan order (by x then y), the order the automaton used to walk the grid in
+    def getScheduledSlots(self):
+        slots = np.flatnonzero(self.scheduled[:self.size])
+        return slots[np.lexsort((self.y[slots], self.x[slots]))]
+
+    # Turn info of several slots at once: the turn rolls of every cell come from one draw per roll
+    def drawTurnInfo(self, slots, inertGrid):
+        generator = SimulationRandom().generator("cells")
+        self.turnRoll[slots] = generator.uniform(0.6, 1.4, len(slots))
+        self.turnRollAlt[slots] = generator.uniform(0.7, 1.3, len(slots))
+        self.tightTurnRoll[slots] = generator.uniform(0.9, 1.1, len(slots))
+        self.inertUnderCell[slots] = inertGrid[self.x[slots], self.y[slots]]
+
+    # -1 or 1 for each slot, -1 with odds growing with the luck of the cell (scaled -100 to 100), drawn from generator
+    def luckChoices(self, slots, generator):
+        unluckyOdds = np.clip((self.luck[slots] + 100) / 200, 0, 1)
+        return np.where(generator.random(len(slots)) < unluckyOdds, -1, 1)
+
+    def getStateMask(self, slots, state):
+        return self.state[slots] == CELL_STATE_CODES[state]
+
+    # Write the same memory event in the ring of several slots, with one payload per slot (or none)
+    def remember(self, slots, event, details=None):
+        if not MEMORY_CAPACITY or len(slots) == 0:
+            return
+        index = self.memoryCount[slots] % MEMORY_CAPACITY
+        self.memoryTurn[slots, index] = self.turnCount[slots]
+        self.memoryEvent[slots, index] = MEMORY_EVENT_CODES[event]
+        self.memoryPayload[slots, index] = np.nan if details is None else details
+        self.memoryCount[slots] += 1
+
+    # remember() for a single slot, for the per cell code
+    def rememberSlot(self, slot, event, payload=np.nan):
+        if not MEMORY_CAPACITY:
+            return
+        index = self.memoryCount[slot] % MEMORY_CAPACITY
+        self.memoryTurn[slot, index] = self.turnCount[slot]
+        self.memoryEvent[slot, index] = MEMORY_EVENT_CODES[event]
+        self.memoryPayload[slot, index] = payload
+        self.memoryCount[slot] += 1
+
+    # (turn, text, detail) of the events a slot still remembers, oldest first
+    def getMemories(self, slot):
+        count = self.memoryCount[slot]
+        order = np.arange(max(0, count - MEMORY_CAPACITY), count) % max(1, MEMORY_CAPACITY)
+        return [(int(turn), *describeMemory(code, payload))
+                for turn, code, payload in zip(self.memoryTurn[slot, order], self.memoryEvent[slot, order], self.memoryPayload[slot, order])]
+
+    # State code matching the energy of each slot, NO_STATE where the state doesn't change
+    def classifyPhases(self, slots):
+        return PHASE_STATE_CODES[np.searchsorted(PHASE_ENERGY_BOUNDS, self.energy[slots], side="left")]
+
+    # Cell.phaseTransition over several slots at once, the change and stable counts go to stats in one call each
+    def phaseTransition(self, slots, stats):
+        states = self.classifyPhases(slots)
+        classified = states != NO_STATE
+        changed = classified & (states != self.state[slots])
+        stable = classified & ~changed
+        self.state[slots[changed]] = states[changed]
+        stats.addCellStateChanges(np.bincount(states[changed], minlength=len(CELL_STATES)))
+        stats.addCellStateStables(np.count_nonzero(stable))
+        for code, state in enumerate(CELL_STATES):
+            self.remember(slots[changed & (states == code)], PHASE_MEMORIES[state][0])
+            self.remember(slots[stable & (states == code)], PHASE_MEMORIES[state][1])
+
+    # Decay (energy, age, growth, attractiveness) of the living cells of several slots at once, returns the slots of the cells that died
+    def decay(self, slots):
+        if len(slots) == 0:
+            return slots
+        generator = SimulationRandom().generator("decay")
+        turnRoll, turnRollAlt = self.turnRoll[slots], self.turnRollAlt[slots]
+        energy = self.energy[slots] - (turnRoll * (self.energy[slots]/CELL_DECAY_ENERGY_MULTIPLIER) + 1)
+        age = self.age[slots] + turnRollAlt * CELL_DECAY_AGE_PER_TURN
+        growthRate = self.growthRate[slots] - turnRoll * (self.growthRate[slots]/self.growthDecayRate[slots])
+        height = self.height[slots] + turnRollAlt * growthRate/100
+        lifeExpectancyMin, lifeExpectancyMax = self.lifeExpectancyMin[slots], self.lifeExpectancyMax[slots]
+        lifeExpectancy = self.lifeExpectancy[slots] + self.luckChoices(slots, generator) * \
+                         ((lifeExpectancyMin + (lifeExpectancyMax - lifeExpectancyMin) * generator.random(len(slots)))/100)
+        attractiveness = turnRoll * (((energy*CELL_ATTRACTIVENESS_NORM_ENERGY)+ \
+                                      (age*CELL_ATTRACTIVENESS_NORM_AGE)+ \
+                                      (growthRate*CELL_ATTRACTIVENESS_NORM_GROWTH)+ \
+                                      (self.resilience[slots]*CELL_ATTRACTIVENESS_NORM_RESILIENCE)+ \
+                                      (self.perception[slots]*CELL_ATTRACTIVENESS_NORM_STRENGTH)+ \
+                                      (self.speed[slots]*CELL_ATTRACTIVENESS_NORM_SPEED)+ \
+                                      (self.lightEmission[slots]*CELL_ATTRACTIVENESS_NORM_LIGHTEMISSION) + \
+                                      (self.mutationRate[slots]*CELL_ATTRACTIVENESS_NORM_MUTATIONRATE) + \
+                                      (lifeExpectancy*CELL_ATTRACTIVENESS_NORM_LIFE_EXPECTANCY) + \
+                                      (self.mass[slots]*CELL_ATTRACTIVENESS_NORM_MASS) + \
+                                      (height*CELL_ATTRACTIVENESS_NORM_HEIGHT)) / \
+                                      (11*CELL_ATTRACTIVENESS_NORM_NORM))
+        topRecord = attractiveness > self.attractivenessTopRecord[slots]
+        self.attractivenessTopRecord[slots[topRecord]] = attractiveness[topRecord]
+        self.lifeExpectancyMax[slots[topRecord]] += lifeExpectancyMax[topRecord]/100
+        energyStorage = self.energyStorage[slots]
+        overStorage = energy > energyStorage
+        energy[overStorage] = energyStorage[overStorage]
+        self.energyStorage[slots[overStorage]] += 1
+        energyRecord = energy >= self.cellEnergyRecord[slots] * turnRollAlt
+        recordSlots = slots[energyRecord]
+        self.cellEnergyRecord[recordSlots] = energy[energyRecord]
+        self.topEnergyDecay[recordSlots] = turnRoll[energyRecord] * (energy[energyRecord]/CELL_DECAY_EXCESS_ENERGY_MULTIPLIER)
+        energy[energyRecord] -= self.topEnergyDecay[recordSlots]
+
+        self.energy[slots] = energy
+        self.age[slots] = age
+        self.growthRate[slots] = growthRate
+        self.height[slots] = height
+        self.lifeExpectancy[slots] = lifeExpectancy
+        self.attractiveness[slots] = attractiveness
+        self.remember(recordSlots, "Fuck, being this cool is too hard, I lost energy", self.topEnergyDecay[recordSlots])
+        self.remember(slots, "I'm really rated {} percent hot!?", attractiveness)
+        return slots[(energy <= 0) | (age >= (turnRollAlt * lifeExpectancy))]  # Death by starvation or old age
+
+    # Uniform draw of each trait within the bounds of the state of each slot, a single draw for the whole batch
+    def drawTraits(self, slots, generator, traits=SPAWN_TRAITS):
+        bounds = self.traitBounds[self.state[slots]][:, [TRAIT_INDEX[trait] for trait in traits]]
+        low, high = bounds[..., MIN], bounds[..., MAX]
+        return low + (high - low) * generator.random(low.shape)
+
+    # Cell.spawnNew for a batch of freshly allocated slots
+    def spawnNew(self, slots, stats):
+        generator = SimulationRandom().generator("spawn")
+        self.turnCount[slots] = 0
+        self.energy[slots] = generator.uniform(CELL_BASE_ENERGY_MIN, CELL_BASE_ENERGY_MAX, len(slots)) # Starting energy level
+        self.phaseTransition(slots, stats) # Set the cell state, which picks the bounds of every trait
+        for trait, values in zip(SPAWN_TRAITS, self.drawTraits(slots, generator).T):
+            getattr(self, trait)[slots] = values
+        lifeExpectancyMin, lifeExpectancyMax = self.lifeExpectancyMin[slots], self.lifeExpectancyMax[slots]
+        self.lifeExpectancy[slots] = lifeExpectancyMin + (lifeExpectancyMax - lifeExpectancyMin) * generator.random(len(slots))
+        for low, high in ((self.fertilityAgeMin, self.fertilityAgeMax), (self.lifeExpectancyMin, self.lifeExpectancyMax)):
+            low[slots], high[slots] = np.minimum(low[slots], high[slots]), np.maximum(low[slots], high[slots])
+
+    # Cell.spawnChild for a batch of freshly allocated slots, each with the slot of its parent. The parents have
+    # already paid for the birth
+    def spawnChildren(self, slots, parents, stats):
+        self.turnCount[slots] = self.turnCount[parents] - 1 # Set it as eligible for a turn, i guess
+        generator = SimulationRandom().generator("reproduction")
+        energy = generator.uniform(CELL_BASE_ENERGY_MIN, CELL_BASE_ENERGY_MAX, len(slots))
+        parentEnergy = self.energy[parents]
+        self.energy[slots] = np.where(energy > parentEnergy*0.5, energy + (parentEnergy-(parentEnergy/CELL_REPRODUCTION_SUCCESS_COST)) / 2, energy)
+        self.phaseTransition(slots, stats)
+        stats.addCellStateChange("???", np.count_nonzero(self.state[slots] == NO_STATE))
+
+        # Half inherited, half drawn within the bounds of the new state, then every inherited trait is mutated
+        # (with the mutation rate as it stands when the trait comes up)
+        self.mutationRate[slots] = (self.drawTraits(slots, generator, ("mutationRate",))[:, 0] + self.mutationRate[parents]) / 2
+        for trait in INHERITED_TRAITS:
+            column = getattr(self, trait)
+            column[slots] = column[parents] + self.luckChoices(slots, generator) * ((column[parents]/100) * self.mutationRate[slots])
+        self.normalizeTraits(slots, INHERITED_TRAITS)
+
+        lifeExpectancyMin, lifeExpectancyMax = self.lifeExpectancyMin[slots], self.lifeExpectancyMax[slots]
+        self.lifeExpectancy[slots] = lifeExpectancyMin + (lifeExpectancyMax - lifeExpectancyMin) * generator.random(len(slots))
+        self.luck[slots] += (self.luck[parents]/(80+self.age[parents])) * self.mutationRate[slots] # Get a bit of luck from your parent
+        self.height[slots] /= 2 # they DO also wanna mutate, cause mutate then lost 50% parent height
+        self.mass[slots] /= 2
+
+    # Reproduction up to the birth itself for several slots at once: the cells too young, too old or too tired
+    # are handled here, the slots of the cells giving birth this turn are returned
+    def reproduce(self, slots, stats):
+        slots = slots[self.alive[slots]]
+        elderly = slots[self.age[slots] > self.fertilityAgeMax[slots]]
+        stats.addCellElderly(len(elderly))
+        self.resilience[elderly] -= self.resilience[elderly]/100
+        slots = slots[self.age[slots] <= self.fertilityAgeMax[slots]]
+
+        youth = slots[self.age[slots] < self.fertilityAgeMin[slots]]
+        stats.addCellYouth(len(youth))
+        growthRate, mutationRate, mass = self.growthRate[youth], self.mutationRate[youth], self.mass[youth]
+        self.mass[youth] += np.maximum(1, np.maximum(growthRate, mutationRate)/np.maximum(1, np.minimum(growthRate, mutationRate))) * np.maximum(1, mass/100)
+        self.remember(youth, "I'm just a kid!")
+        slots = slots[self.age[slots] >= self.fertilityAgeMin[slots]]
+
+        stats.addCellAdult(len(slots))
+        exhausted = slots[self.energy[slots] < self.fertilityEnergy[slots]]
+        stats.addCellBabyFailed("Exhausted", len(exhausted))
+        self.remember(exhausted, "Too lazy to fuck")
+        self.fertilityRate[exhausted] += 1
+        self.energyStorage[exhausted] += self.luckChoices(exhausted, SimulationRandom().generator("reproduction"))
+        slots = slots[self.energy[slots] >= self.fertilityEnergy[slots]]
+
+        # Generate a baby cell if enough energy
+        fertile = (self.turnRollAlt[slots] * 100) < self.fertilityRate[slots]
+        attractive = self.attractiveness[slots] > ((self.attractivenessTopRecord[slots]/10)*9)
+        return slots[fertile | attractive]
+
+    # Pull traits back within the bounds of each slot's state: negative values are zeroed where the state minimum
+    # is 0, and values above the state maximum are averaged with it
+    def normalizeTraits(self, slots, traits):
+        columns = [TRAIT_INDEX[trait] for trait in traits]
+        bounds = self.traitBounds[self.state[slots]][:, columns]
+        for trait, low, high in zip(traits, bounds[..., MIN].T, bounds[..., MAX].T):
+            values = getattr(self, trait)[slots]
+            values = np.where((low == 0) & (values < 0), 0, values)
+            getattr(self, trait)[slots] = np.where(values > high, (values + high) / 2, values)
+
+    def getOccupiedSlots(self):
+        return np.flatnonzero(self.occupied[:self.size])
+
+    def getLivingSlots(self):
+        return np.flatnonzero(self.occupied[:self.size] & self.alive[:self.size])
+
+    def __len__(self):
+        return self.size - len(self.freeSlots) - len(self.releasedSlots)
@@ -6,10 +6,14 @@ from enum import Enum
 import random
 
 
+# RANDOMNESS SETTINGS #
+SIMULATION_SEED = None # Any int replays the same simulation, None draws a new one every run
+
 # ENVIRONMENT SIMULATION SETTINGS #
 GRID_SIZE = 100
 NUM_STEPS = 1000
 CELL_BASE_COUNT = 5000 #50
+CELL_POPULATION_BASE_CAPACITY = CELL_BASE_COUNT * 2 # slots preallocated in the population store, doubled whenever it fills up
 
 class CellState(Enum):
     PLASMA = "plasma"
@@ -28,6 +32,8 @@ CELL_SOLID_ENERGY = 50
 CELL_INERT_ENERGY = 0
 INERT_STONE_SOFTNESS = 60
 
+CELL_BASE_COLOR_MIN = 0.0
+CELL_BASE_COLOR_MAX = 1.0
 CELL_PLASMA_COLOR_MIN = 0.0
 CELL_PLASMA_COLOR_MAX = 0.1
 CELL_GAS_COLOR_MIN = 0.7
@@ -380,35 +386,24 @@ CELL_SOLID_MUTATIONRATE_MAX = 100
 CELL_INERT_MUTATIONRATE_MIN = 0
 CELL_INERT_MUTATIONRATE_MAX = 100
 
-# fertility age
-CELL_BASE_FERTILITYAGEMIN_MIN = random.uniform(0.9, 1.1) * CELL_BASE_LIFEEXPECTANCYMIN_MAX/100 # min = 1% of death age +- 10%
-CELL_BASE_FERTILITYAGEMIN_MAX = random.uniform(0.9, 1.1) * random.uniform(CELL_BASE_FERTILITYAGEMIN_MIN, CELL_BASE_LIFEEXPECTANCYMIN_MAX) # max = random between start age and death age min
-CELL_BASE_FERTILITYAGEMAX_MIN = random.uniform(1,2) * CELL_BASE_FERTILITYAGEMIN_MAX # end min = 1-2x fertility start
-CELL_BASE_FERTILITYAGEMAX_MAX = random.uniform(CELL_BASE_LIFEEXPECTANCYMIN_MAX, CELL_BASE_LIFEEXPECTANCYMAX_MIN) # end max = random between death min and death max
-CELL_PLASMA_FERTILITYAGEMIN_MIN = random.uniform(0.9, 1.1) * CELL_PLASMA_LIFEEXPECTANCYMIN_MAX/100
-CELL_PLASMA_FERTILITYAGEMIN_MAX = random.uniform(0.9, 1.1) * max(CELL_PLASMA_FERTILITYAGEMIN_MIN, CELL_PLASMA_LIFEEXPECTANCYMIN_MAX)
-CELL_PLASMA_FERTILITYAGEMAX_MIN = random.uniform(1,2) * CELL_PLASMA_FERTILITYAGEMIN_MAX
-CELL_PLASMA_FERTILITYAGEMAX_MAX = random.uniform(CELL_PLASMA_LIFEEXPECTANCYMIN_MAX, CELL_PLASMA_LIFEEXPECTANCYMAX_MIN)
-CELL_GAS_FERTILITYAGEMIN_MIN = random.uniform(0.9, 1.1) * CELL_GAS_LIFEEXPECTANCYMIN_MAX/100
-CELL_GAS_FERTILITYAGEMIN_MAX = random.uniform(0.9, 1.1) * max(CELL_GAS_FERTILITYAGEMIN_MIN, CELL_GAS_LIFEEXPECTANCYMIN_MAX)
-CELL_GAS_FERTILITYAGEMAX_MIN = random.uniform(1,2) * CELL_GAS_FERTILITYAGEMIN_MAX
-CELL_GAS_FERTILITYAGEMAX_MAX = random.uniform(CELL_GAS_LIFEEXPECTANCYMIN_MAX, CELL_GAS_LIFEEXPECTANCYMAX_MIN)
-CELL_LIQUID_FERTILITYAGEMIN_MIN = random.uniform(0.9, 1.1) * CELL_LIQUID_LIFEEXPECTANCYMIN_MAX/100
-CELL_LIQUID_FERTILITYAGEMIN_MAX = random.uniform(0.9, 1.1) * max(CELL_LIQUID_FERTILITYAGEMIN_MIN, CELL_LIQUID_LIFEEXPECTANCYMIN_MAX)
-CELL_LIQUID_FERTILITYAGEMAX_MIN = random.uniform(1,2) * CELL_LIQUID_FERTILITYAGEMIN_MAX
-CELL_LIQUID_FERTILITYAGEMAX_MAX = random.uniform(CELL_LIQUID_LIFEEXPECTANCYMIN_MAX, CELL_LIQUID_LIFEEXPECTANCYMAX_MIN)
-CELL_MESOPHASE_FERTILITYAGEMIN_MIN = random.uniform(0.9, 1.1) * CELL_MESOPHASE_LIFEEXPECTANCYMIN_MAX/100
-CELL_MESOPHASE_FERTILITYAGEMIN_MAX = random.uniform(0.9, 1.1) * max(CELL_MESOPHASE_FERTILITYAGEMIN_MIN, CELL_MESOPHASE_LIFEEXPECTANCYMIN_MAX)
-CELL_MESOPHASE_FERTILITYAGEMAX_MIN = random.uniform(1,2) * CELL_MESOPHASE_FERTILITYAGEMIN_MAX
-CELL_MESOPHASE_FERTILITYAGEMAX_MAX = random.uniform(CELL_MESOPHASE_LIFEEXPECTANCYMIN_MAX, CELL_MESOPHASE_LIFEEXPECTANCYMAX_MIN)
-CELL_SOLID_FERTILITYAGEMIN_MIN = random.uniform(0.9, 1.1) * CELL_SOLID_LIFEEXPECTANCYMIN_MAX/100
-CELL_SOLID_FERTILITYAGEMIN_MAX = random.uniform(0.9, 1.1) * max(CELL_SOLID_FERTILITYAGEMIN_MIN, CELL_SOLID_LIFEEXPECTANCYMIN_MAX)
-CELL_SOLID_FERTILITYAGEMAX_MIN = random.uniform(1,2) * CELL_SOLID_FERTILITYAGEMIN_MAX
-CELL_SOLID_FERTILITYAGEMAX_MAX = random.uniform(CELL_SOLID_LIFEEXPECTANCYMIN_MAX, CELL_SOLID_LIFEEXPECTANCYMAX_MIN)
-CELL_INERT_FERTILITYAGEMIN_MIN = random.uniform(0.9, 1.1) * CELL_INERT_LIFEEXPECTANCYMIN_MAX/100
-CELL_INERT_FERTILITYAGEMIN_MAX = random.uniform(0.9, 1.1) * max(CELL_INERT_FERTILITYAGEMIN_MIN, CELL_INERT_LIFEEXPECTANCYMIN_MAX)
-CELL_INERT_FERTILITYAGEMAX_MIN = random.uniform(1,2) * CELL_INERT_FERTILITYAGEMIN_MAX
-CELL_INERT_FERTILITYAGEMAX_MAX = random.uniform(CELL_INERT_LIFEEXPECTANCYMIN_MAX, CELL_INERT_LIFEEXPECTANCYMAX_MIN)
+# fertility age, drawn from the seed of the run by drawFertilityAges
+def drawFertilityAges(seed):
+    configRandom = random.Random(seed)
+    settings = globals()
+    for state in ("BASE", "PLASMA", "GAS", "LIQUID", "MESOPHASE", "SOLID", "INERT"):
+        deathMin = settings[f"CELL_{state}_LIFEEXPECTANCYMIN_MAX"]
+        deathMax = settings[f"CELL_{state}_LIFEEXPECTANCYMAX_MIN"]
+        startMin = configRandom.uniform(0.9, 1.1) * deathMin/100 # min = 1% of death age +- 10%
+        if state == "BASE":
+            startMax = configRandom.uniform(0.9, 1.1) * configRandom.uniform(startMin, deathMin) # max = random between start age and death age min
+        else:
+            startMax = configRandom.uniform(0.9, 1.1) * max(startMin, deathMin)
+        settings[f"CELL_{state}_FERTILITYAGEMIN_MIN"] = startMin
+        settings[f"CELL_{state}_FERTILITYAGEMIN_MAX"] = startMax
+        settings[f"CELL_{state}_FERTILITYAGEMAX_MIN"] = configRandom.uniform(1,2) * startMax # end min = 1-2x fertility start
+        settings[f"CELL_{state}_FERTILITYAGEMAX_MAX"] = configRandom.uniform(deathMin, deathMax) # end max = random between death min and death max
+
+drawFertilityAges(SIMULATION_SEED)
 
 # min energy needed for bebeh
 CELL_BASE_FERTILITYENERGY_MIN = 100
@@ -445,6 +440,7 @@ CELL_INERT_FERTILITYRATE_MAX = 100
 CELL_REPRODUCTION_FAILURE_COST = -0.1 
 CELL_REPRODUCTION_SUCCESS_COST = 5 # multiplier for how much energy loss is incurred from reproducing
 CELL_LIGHTEMISSION_ENERGY_COST_MULTIPLIER = -1
+CELL_LIGHTEMISSION_ENABLED = False # cells emit light during the light exchange (Environment.exchangeLight)
 
 CELL_BABY_MUTATION_GROWTH_MIN = -0.1
 CELL_BABY_MUTATION_GROWTH_MAX = 0.1
@@ -496,6 +492,9 @@ CELL_ATTRACTIVENESS_IMPORTANCE_MODIFER = 50
 CELL_MOVE_BLOCKED_MAX = 4
 CELL_MOVE_ENERGY_MIN = 10
 CELL_MOVE_ENERGY_DECAY_MODIFIER = 100
+CELL_PUSH_CHAIN_MAX = 32 # Longest row of cells a push can move
+CELL_MOVEMENT_MODE = "cell" # "cell": every cell moves in turn, pushing the weaker cells in its way. "batch": all moves
+                            # proposed together then resolved, a blocked cell stays put (no pushing, squishing or bouncing)
 
 # VISUALISATION SETTINGS #
 VISUALISATION_BASE_ENERGY_TOP_RECORD = 100
@@ -530,11 +529,27 @@ VISUALISATION_OUTPUT_FILE_SAVE_SIM_FOLDER = f"{datetime.now().isoformat(timespec
 VISUALISATION_OUTPUT_SCREEN_DISABLE = False # Disable main screen output
 VISUALISATION_OUTPUT_UPDATE_EVERY_N_TURN = 1 # Update the main screen output every N turns
 
+CELL_MEMORY_ENABLED = True # Cells remember what happens to them (only needed to print memories)
+CELL_MEMORY_CAPACITY = 32 # Number of last events each cell remembers, the older ones are forgotten (at least 1)
 CELL_MEMORY_DISPLAY_MODE = "event" # Display memory by event type (event) or turn order (turn) 
 
+LOG_LEVEL = "info" # debug, info, warning or error: debug adds every death, the full stats of each turn and Main's turn lines
+LOG_RATE_LIMITS = {"cell.death": 20, "environment.spawn": 20} # Messages printed per turn by category, the others are only counted
+LOG_COUNTERS_ONLY = False # Print no message, only a line of how many there were per category every LOG_SUMMARY_EVERY_N_TURNS turns
+LOG_SUMMARY_EVERY_N_TURNS = 1 # Turn summary every N turns, 0 for none
+
 RECORDER_PRINT_TO_STDOUT = False
 RECORDER_PRINT_TO_FILE = True
 RECORDER_PRINT_MEMORIES = False
+RECORDER_ARCHIVE_FORMAT = None # Also archive the records as typed columns: "npz" chunks, or "parquet" (npz without pyarrow)
+RECORDER_BACKGROUND_WRITER = True # Format and write the records and certificates on a thread of their own, alongside the next turns
+RECORDER_WRITER_QUEUE_SIZE = 64 # Writes waiting for that thread before the simulation waits for it
+RECORDER_ARCHIVE_ROW_GROUP_SIZE = 10000 # Records gathered before they are written out as one row group
+RECORDER_CERTIFICATE_FILE = "birthDeathStats.txt" # Birth and death certificates of every cell, in the simulation folder
+RECORDER_CERTIFICATE_FLUSH_EVERY_N = 1000 # Certificates kept in memory before they are written to the file
+RECORDER_CERTIFICATE_GZIP = False # Compress the certificates file (.gz)
+RECORDER_CERTIFICATE_ROTATE_SIZE = 64 * 1024 * 1024 # Characters per certificates file before moving on to the next one (0: never)
+RECORDER_CERTIFICATE_ECHO = False # Also print every certificate
 
 RECORDER_STATS_DEFINITION = [
     {
@@ -548,7 +563,7 @@ RECORDER_STATS_DEFINITION = [
         "stat": "parent",
         "display": False,
         "prefix": "",
-        "record": lambda cell, isBirth: f"{cell.parent.id}" if cell.parent is not None else ""
+        "record": lambda cell, isBirth: f"{cell.parentId}" if cell.parentId >= 0 else ""
     }, {
         "stat": "position",
         "name": "Position (x, y)",
@@ -6,76 +6,60 @@ import numpy as np
 import random
 from config import *
 from cell import *
+from cell_population import CellPopulation, EMPTY_SLOT
+from simulation_random import SimulationRandom
+from simulation_log import SimulationLog
+
+# Neighbours a cell can move to
+MOVE_DIRECTIONS = np.array([(0, 1), (1, 0), (0, -1), (-1, 0)])
+# Squares a cell can give birth on
+BIRTH_DIRECTIONS = np.array([(1, 1), (1, -1), (-1, 1), (-1, -1)])
 
 # Environment manages the environments
 class Environment:
     # Create grid and environment
-    def __init__(self, stats):
+    def __init__(self, stats, gridSize=GRID_SIZE):
         self.stats = stats
-        self.grid = np.zeros((GRID_SIZE, GRID_SIZE), dtype=object)  # Allow tracking cell states
-        self.lightGrid = np.ones((GRID_SIZE, GRID_SIZE)) * 10  # Light levels
-        self.waifuGrid = np.zeros((GRID_SIZE, GRID_SIZE))
-        self.inertGrid = np.zeros((GRID_SIZE, GRID_SIZE)) # Fully decayed inerts
-        self.signalGrid = np.zeros((GRID_SIZE, GRID_SIZE))  # Shared perception map
+        self.population = CellPopulation() # Trait columns of every cell on the grid
+        self.grid = np.full((gridSize, gridSize), EMPTY_SLOT, dtype=np.int32)  # Population slot of the cell on each square
+        self.lightGrid = np.ones((gridSize, gridSize)) * 10  # Light levels
+        self.waifuGrid = np.zeros((gridSize, gridSize))
+        self.inertGrid = np.zeros((gridSize, gridSize)) # Fully decayed inerts
+        self.signalGrid = np.zeros((gridSize, gridSize))  # Shared perception map
 
     def updateSignalGrid(self):
-        self.signalGrid.fill(0)
-        # Combine light, waifu, and grid contents
-        for x in range(self.grid.shape[0]):
-            for y in range(self.grid.shape[1]):
-                cell = self.grid[x, y]
-
-                # Base signal from light and waifu grids
-                #baseSignal = (((self.lightGrid[x, y]) * LIGHT_GRID_IMPORTANCE) + ((self.waifuGrid[x, y]) * ATTRACTIVENESS_GRID_IMPORTANCE) + ((self.inertGrid[x, y]) * INERT_GRID_IMPORTANCE))
-                #baseSignal = ((self.lightGrid[x, y]) + (self.waifuGrid[x, y]) + (self.inertGrid[x, y]))
-                self.signalGrid[x, y] = (self.lightGrid[x, y]) + (self.waifuGrid[x, y])
-                continue
-                if cell is None or cell == 0:
-                    # Empty or passable space, keep base signal
-                    self.signalGrid[x, y] = baseSignal
-                elif isinstance(cell, Cell):
-                    # Occupied by a cell: factor in cell attributes
-                    cellSignal = baseSignal
-                    cellSignal -= cell.resilience * 0.1
-                    if cell.state == CellState.LIQUID:
-                        cellSignal += random.uniform(0.5,2)
-                    cellSignal += cell.lightEmission * 1.2
-                    self.signalGrid[x, y] = cellSignal
-                else:
-                    # Impassable terrain (e.g., "inert"), zero out the signal
-                    self.signalGrid[x, y] = baseSignal * 0.01
-
-    # Enrich environment dynamically
+        # Base signal from light and waifu grids
+        #baseSignal = (((self.lightGrid) * LIGHT_GRID_IMPORTANCE) + ((self.waifuGrid) * ATTRACTIVENESS_GRID_IMPORTANCE) + ((self.inertGrid) * INERT_GRID_IMPORTANCE))
+        #baseSignal = ((self.lightGrid) + (self.waifuGrid) + (self.inertGrid))
+        np.add(self.lightGrid, self.waifuGrid, out=self.signalGrid)
+
+    # Enrich environment dynamically, every grid is updated in place
     def enrich_environment(self):
-        # Brighten some random areas
-        for _ in range(ENVIRONMENT_LIGHT_ENRICHMENT_SOURCE_NUM):  # Number of light sources
-            x, y = random.randint(0, GRID_SIZE - 1), random.randint(0, GRID_SIZE - 1)
-            self.lightGrid[x, y] = (self.lightGrid[x, y] + ENVIRONMENT_LIGHT_ENRICHMENT)  # Cap at max brightness
-        self.lightGrid -= random.uniform(-0.5, 1.5) * LIGHT_GRID_DECAY_RATE
-        self.lightGrid = np.clip(self.lightGrid, ENVIRONMENT_LIGHT_CLIP_MIN, ENVIRONMENT_LIGHT_CLIP_MAX)
-        self.inertGrid = np.clip(self.inertGrid, ENVIRONMENT_LIGHT_CLIP_MIN, ENVIRONMENT_LIGHT_CLIP_MAX)
-        self.waifuGrid = np.clip(self.waifuGrid, ENVIRONMENT_LIGHT_CLIP_MIN, ENVIRONMENT_LIGHT_CLIP_MAX)
-        self.signalGrid = np.clip(self.signalGrid, ENVIRONMENT_LIGHT_CLIP_MIN, ENVIRONMENT_LIGHT_CLIP_MAX)
+        rng = SimulationRandom().random("environment")
+        # Brighten some random areas, a square drawn twice is brightened twice
+        sources = [(rng.randint(0, self.grid.shape[0] - 1), rng.randint(0, self.grid.shape[1] - 1)) for _ in range(ENVIRONMENT_LIGHT_ENRICHMENT_SOURCE_NUM)]  # Number of light sources
+        if sources:
+            np.add.at(self.lightGrid, tuple(zip(*sources)), ENVIRONMENT_LIGHT_ENRICHMENT)
+        self.lightGrid -= rng.uniform(-0.5, 1.5) * LIGHT_GRID_DECAY_RATE
+        np.clip(self.lightGrid, ENVIRONMENT_LIGHT_CLIP_MIN, ENVIRONMENT_LIGHT_CLIP_MAX, out=self.lightGrid)
+        np.clip(self.inertGrid, ENVIRONMENT_LIGHT_CLIP_MIN, ENVIRONMENT_LIGHT_CLIP_MAX, out=self.inertGrid)
+        np.clip(self.waifuGrid, ENVIRONMENT_LIGHT_CLIP_MIN, ENVIRONMENT_LIGHT_CLIP_MAX, out=self.waifuGrid)
+        np.clip(self.signalGrid, ENVIRONMENT_LIGHT_CLIP_MIN, ENVIRONMENT_LIGHT_CLIP_MAX, out=self.signalGrid)
         self.waifuGrid -= ATTRACTIVENESS_GRID_DECAY_RATE
         self.inertGrid -= INERT_GRID_DECAY_RATE
-        #print(lightGrid)
-        #print(np.min(lightGrid))
-        #print(np.max(lightGrid))
         #lightGrid = gaussian_filter(lightGrid, sigma=1)  # sigma = more/less blur
-        #print(lightGrid)
 
-    def stir_environment(self, grid):
+    def stir_environment(self):
+        rng = SimulationRandom().random("environment")
         # Randomly displace cells to "stir things up"
         for _ in range(100):  # Number of cells to displace
-            x, y = random.randint(0, GRID_SIZE - 1), random.randint(0, GRID_SIZE - 1)
-            if isinstance(grid[x, y], Cell):
-                dx, dy = random.choice([(0, 1), (1, 0), (0, -1), (-1, 0)])
-                new_x = (x + dx) % GRID_SIZE
-                new_y = (y + dy) % GRID_SIZE
-                if grid[new_x, new_y] is None:
+            x, y = rng.randint(0, self.grid.shape[0] - 1), rng.randint(0, self.grid.shape[1] - 1)
+            cell = self.getCellAt(x, y)
+            if cell is not None:
+                dx, dy = rng.choice([(0, 1), (1, 0), (0, -1), (-1, 0)])
+                if self.canAddCellAt(x + dx, y + dy):
                     self.stats.addCellMove()
-                    grid[new_x, new_y] = grid[x, y]
-                    grid[x, y] = None
+                    self.moveCellTo(x + dx, y + dy, cell)
     
     def runLoop(self, turn):
         self.updateSignalGrid()
@@ -89,15 +73,169 @@ class Environment:
 
     def attemptForcedSpawn(self, coords):
         x, y = self._boundXY(coords)
-        if self.grid[x, y] == 0 or self.grid[x, y] is None:
+        if self.canAddCellAt(x, y):
             self.stats.addCellForcedSpawn()
             new_cell = Cell(x, y, self.stats, self, organismCheck=None)
-            new_cell.role = random.choice(CELL_ROLES)
-            self.grid[x, y] = new_cell
-            print(f"Placed a {new_cell.role} cell at ({x}, {y})")
+            new_cell.role = SimulationRandom().random("spawn").choice(CELL_ROLES)
+            self.setCellAt(x, y, new_cell)
+            self.population.schedule(new_cell.slot)
+            SimulationLog().info("environment.spawn", "Placed a {} cell at ({}, {})", new_cell.role, x, y)
         else:
             self.stats.addCellFailedForcedSpawn()
-            print(f"Failed placing a new cell, cell ({x} {y}) is full")
+            SimulationLog().info("environment.spawn", "Failed placing a new cell, cell ({} {}) is full", x, y)
+
+    # Light exchange of the cells of several slots with the light grid, absorption (and emission when
+    # CELL_LIGHTEMISSION_ENABLED) for all of them at once. Ordering rules, so runs are reproducible:
+    # - every cell reads the light grid as it stands when the exchange starts, and emits after its own absorption
+    # - the changes of every square are summed back with a single np.add.at, so the order of the slots doesn't matter
+    # The changes mirror depleteLightAt / addLightAt: setLightAt adds the value it is given to the square, so the light
+    # read on the square is added back along with the depletion (or emission).
+    def exchangeLight(self, slots):
+        population = self.population
+        generator = SimulationRandom().generator("cells")
+        x, y = population.x[slots], population.y[slots]
+        light = self.lightGrid[x, y]
+        change = np.zeros(len(slots))
+
+        alive = population.alive[slots]
+        living = slots[alive]
+        absorbed = (light[alive]/100) * population.lightAbsorption[living]
+        full = (absorbed + population.energy[living]) > population.lightStorage[living]
+        depletion = np.where(full, (absorbed * ENVIRONMENT_LIGHTABSORPTION_WASTE)/100, absorbed * ENVIRONMENT_LIGHTABSORPTION_WASTE)
+        population.energy[living[~full]] += absorbed[~full]
+        population.luck[living[full]] = population.luckChoices(living[full], generator) * 0.1
+        population.remember(living[full], "Light Reserves Full", absorbed[full])
+        population.remember(living[~full], "Gained Light Energy", absorbed[~full])
+        change[alive] = light[alive] - depletion
+
+        if CELL_LIGHTEMISSION_ENABLED:
+            plasma = population.getStateMask(slots, CellState.PLASMA) # Plasma cells consistently emit high light
+            sudden = ~plasma & (generator.random(len(slots)) < 0.01) & (population.energy[slots] > population.fertilityEnergy[slots])
+            emission = population.lightEmission[slots]
+            emission[plasma] += population.luckChoices(slots[plasma], generator) * (emission[plasma]/50)
+            emission[sudden] += population.luckChoices(slots[sudden], generator) * (emission[sudden]/100)
+            population.lightEmission[slots] = emission
+            population.energy[slots[plasma | sudden]] -= emission[plasma | sudden]
+            population.luck[slots[sudden]] += 1
+            population.remember(slots[plasma], "Emitted light", emission[plasma])
+            population.remember(slots[sudden], "Suddenly emitted light?!", emission[sudden])
+            change += (light + change) + emission
+
+        np.add.at(self.lightGrid, (x, y), change)
+
+    # Cell.move for several cells at once (CELL_MOVEMENT_MODE = "batch"), in two steps against the board as it is at
+    # the start of the phase:
+    # - every cell proposes a square: the free neighbour with the best signal (an argmax over the signal planes
+    #   shifted by each of the 4 directions), or a random square around it when it is blind
+    # - each proposed square goes to the most resilient of the cells that want it, ties broken at random
+    # A cell only gets one go: blocked or outbid, it stays where it is this turn.
+    def moveCells(self, slots):
+        population = self.population
+        generator = SimulationRandom().generator("movement")
+        resting = ~population.alive[slots] | (population.energy[slots] < CELL_MOVE_ENERGY_MIN)
+        population.remember(slots[resting], "had a lie in today", population.energy[slots[resting]])
+        self.stats.addCellStop(np.count_nonzero(resting))
+        slots = slots[~resting]
+        width, height = self.grid.shape
+        x, y = population.x[slots], population.y[slots]
+
+        neighboursX = (x[:, None] + MOVE_DIRECTIONS[:, 0]) % width
+        neighboursY = (y[:, None] + MOVE_DIRECTIONS[:, 1]) % height
+        signals = np.where(self.grid[neighboursX, neighboursY] == EMPTY_SLOT, self.signalGrid[neighboursX, neighboursY], -np.inf)
+        bestSignal = signals.max(axis=1)
+        best = np.argmax((signals == bestSignal[:, None]) * generator.random(signals.shape), axis=1)
+        dx, dy = MOVE_DIRECTIONS[best, 0], MOVE_DIRECTIONS[best, 1]
+
+        # Going back and forth between two squares, try somewhere else
+        looping = (bestSignal > -1) & ((x + dx) % width == population.prevX[slots]) & ((y + dy) % height == population.prevY[slots])
+        population.moveLoopCounter[slots[looping]] += 1
+        stuck = (bestSignal > -1) & (population.moveLoopCounter[slots] > 3)
+        population.moveLoopCounter[slots[stuck]] = 0
+        dx[stuck], dy[stuck] = MOVE_DIRECTIONS[generator.integers(0, 4, np.count_nonzero(stuck))].T
+
+        blind = population.perception[slots] < CELL_BLINDLESS_LEVEL
+        dx[blind], dy[blind] = generator.integers(-1, 2, (2, np.count_nonzero(blind)))
+        targetX, targetY = (x + dx) % width, (y + dy) % height
+        free = (blind | (bestSignal > -1)) & (self.grid[targetX, targetY] == EMPTY_SLOT)
+
+        # One winner per square: sort by square, then by resilience, then by a random draw
+        movers = np.flatnonzero(free)
+        squares = targetX[movers] * height + targetY[movers]
+        order = np.lexsort((generator.random(len(movers)), -population.resilience[slots[movers]], squares))
+        first = np.ones(len(order), dtype=bool)
+        first[1:] = squares[order[1:]] != squares[order[:-1]]
+        winners, outbid = movers[order[first]], movers[order[~first]]
+
+        blocked = np.flatnonzero(~free)
+        population.luck[slots[blocked]] -= 0.2
+        population.remember(slots[blocked], "Blocked, I'll try again tomorrow")
+        population.remember(slots[outbid], "Blocked by stronger cell")
+
+        moved, fromX, fromY = slots[winners], x[winners], y[winners]
+        toX, toY, dx, dy = targetX[winners], targetY[winners], dx[winners], dy[winners]
+        inertUnderCell = self.inertGrid[fromX, fromY]
+        self.grid[fromX, fromY] = EMPTY_SLOT
+        self.grid[toX, toY] = moved
+        population.prevX[moved], population.prevY[moved] = fromX, fromY
+        population.x[moved], population.y[moved] = toX, toY
+        self.inertGrid[toX, toY] *= 0.99
+
+        # Water erosion, see Cell.waterErosion
+        liquid = population.getStateMask(moved, CellState.LIQUID)
+        self.inertGrid[toX[liquid], toY[liquid]] -= inertUnderCell[liquid]/20
+        for side in (1, -1):
+            np.add.at(self.inertGrid, ((toX[liquid] - dx[liquid] + side * abs(dy[liquid])) % width,
+                                       (toY[liquid] - dy[liquid] + side * abs(dx[liquid])) % height), inertUnderCell[liquid]/10)
+
+        self.stats.addCellMove(len(moved))
+        population.remember(moved, "Moved to signal {}", self.signalGrid[toX, toY])
+
+    # Inert cells 'birth' enrichment onto the environment, for several cells at once: 20% of the mass they lose goes
+    # to their square, 10% to each adjacent one, 40% is lost. The ones left without mass die and disappear from the
+    # board, their slots are returned
+    def disintegrate(self, slots):
+        population = self.population
+        width, height = self.grid.shape
+        x, y = population.x[slots], population.y[slots]
+        enrichInert = population.mass[slots]/100 + 1
+        population.mass[slots] -= enrichInert
+        np.add.at(self.inertGrid, (x, y), enrichInert * 0.2)
+        for dx, dy in MOVE_DIRECTIONS:
+            np.add.at(self.inertGrid, ((x + dx) % width, (y + dy) % height), enrichInert * 0.1)
+        self.stats.addCellDisintegration(len(slots))
+        population.remember(slots, "Enriched the earth", enrichInert * 0.6)
+
+        gone = slots[population.mass[slots] <= 0]
+        population.mass[gone] = 0
+        population.alive[gone] = False
+        self.stats.addCellDisintegrationDeath(len(gone))
+        population.remember(gone, "Oop bye")
+        for slot in gone.tolist():
+            self.removeCellFromGrid(population.cells[slot])
+        return gone
+
+    # A free diagonal square for each parent of slots, read from the occupancy grid shifted by each diagonal. Every
+    # parent picks one of its free diagonals at random and parents wanting the same square draw lots for it.
+    # Returns the parents that got a square with its coordinates, then the parents left without room
+    def findBirthSquares(self, slots):
+        population = self.population
+        generator = SimulationRandom().generator("reproduction")
+        width, height = self.grid.shape
+        squaresX = (population.x[slots][:, None] + BIRTH_DIRECTIONS[:, 0]) % width
+        squaresY = (population.y[slots][:, None] + BIRTH_DIRECTIONS[:, 1]) % height
+        free = self.grid[squaresX, squaresY] == EMPTY_SLOT
+        pick = np.argmax(free * generator.random(free.shape), axis=1)
+        squaresX, squaresY = squaresX[np.arange(len(slots)), pick], squaresY[np.arange(len(slots)), pick]
+
+        candidates = np.flatnonzero(free.any(axis=1))
+        squares = squaresX[candidates] * height + squaresY[candidates]
+        order = np.lexsort((generator.random(len(candidates)), squares))
+        first = np.ones(len(order), dtype=bool)
+        first[1:] = squares[order[1:]] != squares[order[:-1]]
+        winners = np.sort(candidates[order[first]])
+        crowded = np.ones(len(slots), dtype=bool)
+        crowded[winners] = False
+        return slots[winners], squaresX[winners], squaresY[winners], slots[crowded]
 
     # Get light amount at a coordinate
     def getLightAt(self, x, y):
@@ -150,33 +288,60 @@ class Environment:
 
     def getCellAt(self, x, y):
         x, y = self._boundXY((x, y))
-        return self.grid[x, y]
+        slot = self.grid[x, y]
+        return None if slot == EMPTY_SLOT else self.population.cells[slot]
     
     def setCellAt(self, x, y, cell):
         x, y = self._boundXY((x, y))
-        self.grid[x, y] = cell
+        self.grid[x, y] = EMPTY_SLOT if cell is None else cell.slot
 
     def moveCellTo(self, x, y, cell):
         x, y = self._boundXY((x, y))
-        self.grid[cell.x, cell.y] = None
-        self.grid[x, y] = cell
+        self.grid[cell.x, cell.y] = EMPTY_SLOT
+        self.grid[x, y] = cell.slot
         cell.x = x
         cell.y = y
 
     def removeCellAt(self, x, y, cell):
-        if self.getCellAt(x, y) == cell:
+        if self.getCellAt(x, y) is cell:
             self.setCellAt(x, y, None)
         else:
-            raise Exception("The cell {cell} isn't located here and can't be removed")
+            raise Exception(f"The cell {cell} isn't located here and can't be removed")
 
     def removeCellFromGrid(self, cell):
         self.removeCellAt(cell.x, cell.y, cell)
+        self.population.release(cell.slot)
 
     def canAddCellAt(self, x, y):
         x, y = self._boundXY((x, y))
-        return self.grid[x, y] is None or self.grid[x, y] == 0
+        return self.grid[x, y] == EMPTY_SLOT
         # len(self.grid[x, y]) == 0 or (len(self.grid[x, y]) == 1 and self.grid[x, y][0].state == "gas")
 
+    # Whole grid questions, answered with a single mask over the occupancy grid
+    def getEmptyMask(self):
+        return self.grid == EMPTY_SLOT
+
+    def getCellMask(self):
+        return self.grid != EMPTY_SLOT
+
+    def getLivingCellMask(self):
+        mask = self.getCellMask()
+        mask[mask] = self.population.alive[self.grid[mask]]
+        return mask
+
+    def getCellCount(self):
+        return np.count_nonzero(self.grid != EMPTY_SLOT)
+
+    def getLivingCellCount(self):
+        return np.count_nonzero(self.getLivingCellMask())
+
+    # (x, y) of every occupied square, in grid scan order
+    def getCellPositions(self):
+        return np.argwhere(self.grid != EMPTY_SLOT)
+
+    def getLivingCellPositions(self):
+        return np.argwhere(self.getLivingCellMask())
+
     def getHeightAt(self, x, y):
         x, y = self._boundXY((x, y))
         return self.heightGrid[x, y]
@@ -0,0 +1,68 @@
+# GENEALOGY FILE: GAME OF WHY
+# CHARIS CAT 2024
+
+import numpy as np
+
+# Parent id of the cells that were spawned rather than born to another cell
+NO_PARENT = -1
+
+# Genealogy keeps the lineage of every cell ever born as arrays indexed by cell id, the cells themselves can be let go
+class Genealogy:
+    def __init__(self, capacity=1024):
+        self.parentIds = np.full(capacity, NO_PARENT, dtype=np.int64)
+        self.depths = np.zeros(capacity, dtype=np.int32)
+        self.size = 0 # ids [0, size) have been seen
+        self.children = None # (parent ids sorted, child ids in the same order), built on demand by descendants()
+
+    def grow(self, capacity):
+        parentIds = np.full(capacity, NO_PARENT, dtype=np.int64)
+        parentIds[:len(self.parentIds)] = self.parentIds
+        depths = np.zeros(capacity, dtype=np.int32)
+        depths[:len(self.depths)] = self.depths
+        self.parentIds, self.depths = parentIds, depths
+
+    # Births of the cells of ids, to the cells of parentIds (NO_PARENT for the spawned ones), parents first
+    def addBirths(self, ids, parentIds):
+        ids = np.asarray(ids, dtype=np.int64)
+        parentIds = np.asarray(parentIds, dtype=np.int64)
+        if len(ids) == 0:
+            return
+        end = int(ids.max()) + 1
+        if end > len(self.parentIds):
+            self.grow(max(end, 2 * len(self.parentIds)))
+        born = parentIds != NO_PARENT
+        self.parentIds[ids] = parentIds
+        self.depths[ids] = np.where(born, self.depths[np.where(born, parentIds, 0)] + 1, 0)
+        self.size = max(self.size, end)
+        self.children = None
+
+    def getParent(self, id):
+        return int(self.parentIds[id])
+
+    # Generations between a cell and its spawned ancestor (0 for a spawned cell)
+    def getDepth(self, id):
+        return int(self.depths[id])
+
+    # Ids of the parent, grandparent... of a cell, nearest first
+    def getAncestors(self, id):
+        ancestors = []
+        parent = self.parentIds[id]
+        while parent != NO_PARENT:
+            ancestors.append(int(parent))
+            parent = self.parentIds[parent]
+        return ancestors
+
+    # Ids of the children, grandchildren... of a cell, one generation after the other
+    def getDescendants(self, id):
+        if self.children is None:
+            order = np.argsort(self.parentIds[:self.size], kind="stable")
+            self.children = (self.parentIds[order], order)
+        parents, children = self.children
+        generations = []
+        generation = np.array([id], dtype=np.int64)
+        while len(generation):
+            starts = np.searchsorted(parents, generation, side="left")
+            ends = np.searchsorted(parents, generation, side="right")
+            generation = np.concatenate([children[start:end] for start, end in zip(starts, ends)])
+            generations.append(generation)
+        return np.concatenate(generations).tolist()
@@ -0,0 +1,92 @@
+# SIMULATION FILE: GAME OF WHY
+# CHARIS CAT 2024
+
+import argparse
+import cProfile
+import pstats
+
+from config import *
+from stats import Stats
+from environment import Environment
+from automaton import Automaton
+from simulation_recorder import SimulationRecorder
+from simulation_random import SimulationRandom
+from simulation_log import SimulationLog
+
+class Simulation:
+    """
+    One run of the game, without any display: stats, environment, cells and recorder stepped turn by turn.
+    A visualisation can be attached (simulation.visualisation = Visualisation(simulation.stats, simulation.environments)),
+    it is then drawn every turn.
+    """
+
+    def __init__(self, lastTurn=NUM_STEPS):
+        # The recorder, random streams and log are shared by the process, every simulation starts them over
+        SimulationRecorder.instance = None
+        SimulationRandom().reseed(SimulationRandom().seed)
+        SimulationLog().reset()
+        self.stats = Stats()
+        self.environments = Environment(self.stats)
+        self.automaton = Automaton(self.stats, self.environments)
+        self.simulationRecorder = SimulationRecorder()
+        self.visualisation = None
+        self.lastTurn = lastTurn
+        self.turn = 0
+
+    def runLoop(self, turn):
+        self.stats.beginTurn()
+        self.environments.runLoop(turn)
+        if self.visualisation is not None:
+            self.visualisation.runLoop(turn, end=turn == self.lastTurn)
+        self.automaton.runLoop(turn)
+        self.stats.addCellAlive(self.environments.getLivingCellCount())
+        self.stats.endTurn()
+        SimulationLog().endTurn()
+        self.simulationRecorder.endTurn()
+
+    def step(self, n=1):
+        """Play the next n turns"""
+        for _ in range(n):
+            self.runLoop(self.turn)
+            self.turn += 1
+
+    def run_until(self, turn):
+        """Play every turn until the simulation reaches turn (turn itself isn't played)"""
+        self.step(max(0, turn - self.turn))
+
+    def end(self):
+        self.stats.endRun()
+        if self.visualisation is not None:
+            self.visualisation.endRun(self.lastTurn)
+        self.simulationRecorder.end()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run Game of Why without a display, as fast as it goes")
+    parser.add_argument("--turns", type=int, default=NUM_STEPS + 1, help=f"number of turns to play (default: {NUM_STEPS + 1})")
+    parser.add_argument("--seed", type=int, default=None, help="seed of the simulation streams (default: SIMULATION_SEED)")
+    parser.add_argument("--profile", action="store_true", help="profile the run and print the most expensive functions")
+    parser.add_argument("--render", action="store_true", help="draw every turn in a vispy window")
+    parser.add_argument("--log-level", choices=["debug", "info", "warning", "error"], default=LOG_LEVEL, help=f"(default: {LOG_LEVEL})")
+    parser.add_argument("--quiet", action="store_true", help="print only a count of the messages every LOG_SUMMARY_EVERY_N_TURNS turns")
+    parser.add_argument("--stats", default=None, help="save the counters of every turn to this .csv or .npz file")
+    args = parser.parse_args()
+
+    if args.seed is not None:
+        SimulationRandom().reseed(args.seed)
+    SimulationLog().configure(level=args.log_level, countersOnly=args.quiet)
+    if args.profile:
+        profiler = cProfile.Profile()
+        profiler.enable()
+
+    simulation = Simulation(lastTurn=args.turns - 1)
+    if args.render:
+        from visualisation import Visualisation
+        simulation.visualisation = Visualisation(simulation.stats, simulation.environments)
+    simulation.run_until(args.turns)
+    simulation.end()
+    if args.stats is not None:
+        simulation.stats.exportHistory(args.stats)
+
+    if args.profile:
+        profiler.disable()
+        pstats.Stats(profiler).sort_stats('tottime').print_stats(10) # Top 10 time-consuming functions
@@ -0,0 +1,233 @@
+# BENCHMARK FILE: GAME OF WHY
+# CHARIS CAT 2024
+
+import argparse
+import random
+import subprocess
+import sys
+import tracemalloc
+from os.path import abspath, dirname
+from statistics import median
+from tempfile import TemporaryDirectory
+from time import perf_counter
+
+import numpy as np
+
+from stats import Stats
+from environment import Environment
+from cell import Cell
+from cell_population import CellPopulation
+from simulation_random import SimulationRandom
+
+# Modules a headless run must never load
+RENDERING_MODULES = ("matplotlib", "vispy")
+
+def timeTurns(function, turns):
+    """Run function once per turn and return the median turn time in milliseconds"""
+    times = []
+    for turn in range(turns):
+        start = perf_counter()
+        function(turn)
+        times.append((perf_counter() - start) * 1000)
+    return median(times)
+
+def benchmarkEnvironment(gridSizes=(100, 1000, 4000), turns=20):
+    """Per turn cost of the environment tick (signal, light sources, decays, clipping) for each grid size"""
+    results = {}
+    for gridSize in gridSizes:
+        environment = Environment(Stats(), gridSize=gridSize)
+        results[gridSize] = timeTurns(environment.runLoop, turns)
+        print(f"Environment turn at {gridSize}x{gridSize}: {results[gridSize]:.3f} ms")
+        del environment
+    return results
+
+def benchmarkRandom(populationSizes=(1000, 10000, 100000), turns=20):
+    """Per turn cost of the turn rolls and one luck draw per cell: random module calls per cell against one
+    numpy draw per roll over the population"""
+    results = {}
+    for populationSize in populationSizes:
+        luck = [random.uniform(-100, 100) for _ in range(populationSize)]
+        def perCell(turn):
+            for cellLuck in luck:
+                random.uniform(0.6, 1.4), random.uniform(0.7, 1.3), random.uniform(0.9, 1.1)
+                random.choices([-1, 1], k = 1, weights = [((cellLuck + 100)/200), (1-((cellLuck + 100)/200))])
+
+        population = CellPopulation(populationSize)
+        generator = np.random.default_rng()
+        population.luck[:] = luck
+        slots = np.arange(populationSize)
+        inertGrid = np.zeros((1, 1))
+        def perTurn(turn):
+            population.drawTurnInfo(slots, inertGrid)
+            population.luckChoices(slots, generator)
+
+        results[populationSize] = (timeTurns(perCell, turns), timeTurns(perTurn, turns))
+        print(f"Turn rolls for {populationSize} cells: {results[populationSize][0]:.3f} ms with random, {results[populationSize][1]:.3f} ms with one draw per roll")
+    return results
+
+def benchmarkMemory(cellCounts=(1000, 10000, 100000)):
+    """Bytes per cell of the Cell objects and of the population columns behind them (slack of the doubling included)"""
+    results = {}
+    for cellCount in cellCounts:
+        gridSize = int(np.ceil(np.sqrt(cellCount)))
+        environment = Environment(Stats(), gridSize=gridSize)
+        tracemalloc.start()
+        environment.population = CellPopulation(1)
+        cells = [Cell(i // gridSize, i % gridSize, environment.stats, environment, spawn=False) for i in range(cellCount)]
+        total = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        columns = sum(getattr(environment.population, column).nbytes for column in CellPopulation.columnTypes)
+        results[cellCount] = (total / cellCount, columns / cellCount)
+        print(f"{cellCount} cells: {results[cellCount][0]:.0f} bytes per cell, {results[cellCount][1]:.0f} of them in the population columns")
+        del cells, environment
+    return results
+
+def benchmarkImports(modules=("simulation",), budget=None):
+    """Import time of each module in a fresh interpreter (python -X importtime) in milliseconds. Exits with an error
+    when one of them loads a rendering module or takes longer than budget milliseconds"""
+    results = {}
+    failures = []
+    for module in modules:
+        completed = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                                   capture_output=True, text=True, check=True, cwd=dirname(abspath(__file__)))
+        imported = {}
+        for line in completed.stderr.splitlines():
+            if line.startswith("import time:"):
+                selfTime, cumulative, name = line[len("import time:"):].split("|")
+                if cumulative.strip().isdigit():
+                    imported[name.strip()] = int(cumulative) / 1000
+        results[module] = imported[module]
+        print(f"import {module}: {results[module]:.1f} ms, {len(imported)} modules")
+
+        rendering = sorted({name for name in imported if name.split(".")[0] in RENDERING_MODULES})
+        if rendering:
+            failures.append(f"import {module} loads rendering modules: {', '.join(rendering)}")
+        if budget is not None and results[module] > budget:
+            failures.append(f"import {module} took {results[module]:.1f} ms, over the {budget} ms budget")
+    if failures:
+        sys.exit("\n".join(failures))
+    return results
+
+# Turns played in a fresh interpreter with the output going to a pipe, as it would to a log collector
+OUTPUT_RUN = """
+import sys
+sys.path.insert(0, {path!r})
+from time import perf_counter
+from simulation import Simulation
+from simulation_log import SimulationLog
+from simulation_random import SimulationRandom
+SimulationRandom().reseed({seed})
+SimulationLog().configure(level={level!r}, rateLimits={rateLimits!r}, countersOnly={countersOnly!r})
+simulation = Simulation()
+start = perf_counter()
+simulation.step({turns})
+print(perf_counter() - start, file=sys.stderr)
+"""
+
+def benchmarkOutput(turns=10, seed=None):
+    """Turns per second of the simulation with everything printed (debug level, no rate limit) against the counters
+    only mode, each run in its own interpreter writing to a pipe that is read in full"""
+    results = {}
+    modes = {
+        "verbose": {"level": "debug", "rateLimits": {}, "countersOnly": False},
+        "quiet": {"level": "debug", "rateLimits": {}, "countersOnly": True},
+    }
+    for mode, settings in modes.items():
+        with TemporaryDirectory() as outputFolder: # the recorder's files go there
+            completed = subprocess.run([sys.executable, "-c", OUTPUT_RUN.format(path=dirname(abspath(__file__)), seed=seed, turns=turns, **settings)],
+                                       capture_output=True, text=True, check=True, cwd=outputFolder)
+        seconds = float(completed.stderr.split()[-1])
+        results[mode] = turns / seconds
+        print(f"{mode}: {results[mode]:.2f} turns per second, {len(completed.stdout)} characters of output")
+    return results
+
+# Simulations built, played and ended one after the other in the same interpreter
+RUNS_CHECK = """
+import sys
+sys.path.insert(0, {path!r})
+from time import perf_counter
+from simulation import Simulation
+from simulation_log import SimulationLog
+from simulation_random import SimulationRandom
+seed = {seed}
+SimulationRandom().reseed(seed)
+SimulationLog().configure(countersOnly=True)
+folders, histories = set(), []
+for run in range({runs}):
+    start = perf_counter()
+    simulation = Simulation()
+    simulation.step({turns})
+    recorder = simulation.simulationRecorder
+    nextId = simulation.stats.cellCounter
+    if recorder.folder in folders:
+        sys.exit(f"run {{run}} wrote to the folder of an earlier run, {{recorder.folder}}")
+    if any(id >= nextId for id in recorder.cellArchive) or recorder.genealogy.size > nextId:
+        sys.exit(f"run {{run}} recorded cells of an earlier run")
+    stats = simulation.stats
+    if (stats.history[:stats.historyLength].sum(axis=0) != stats.totals + stats.turn).any():
+        sys.exit(f"run {{run}} turn rows don't add up to the run totals")
+    folders.add(recorder.folder)
+    histories.append(simulation.stats.history[:simulation.stats.historyLength].copy())
+    simulation.end()
+    print(perf_counter() - start, file=sys.stderr)
+if seed is not None and any((history != histories[0]).any() for history in histories):
+    sys.exit("runs of the same seed played differently")
+"""
+
+def benchmarkRuns(runs=2, turns=5, seed=None):
+    """Seconds per run of simulations built, played and ended back to back in one interpreter, which fails if a run
+    sees anything of the ones before it or if its turn rows don't add up to its totals (seeded runs must also play
+    the same)"""
+    with TemporaryDirectory() as outputFolder: # the recorder's files go there
+        completed = subprocess.run([sys.executable, "-c", RUNS_CHECK.format(path=dirname(abspath(__file__)), runs=runs, turns=turns, seed=seed)],
+                                   capture_output=True, text=True, cwd=outputFolder)
+    if completed.returncode != 0:
+        sys.exit(completed.stderr.strip().splitlines()[-1])
+    results = [float(line) for line in completed.stderr.split()]
+    for run, seconds in enumerate(results):
+        print(f"run {run}: {seconds:.2f} s")
+    return results
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Game of Why benchmarks")
+    parser.add_argument("--seed", type=int, default=None, help="seed of the simulation streams (default: SIMULATION_SEED)")
+    benchmarks = parser.add_subparsers(dest="benchmark", required=True)
+
+    environmentParser = benchmarks.add_parser("environment", help="per turn environment cost")
+    environmentParser.add_argument("--grid-sizes", type=int, nargs="+", default=[100, 1000, 4000])
+    environmentParser.add_argument("--turns", type=int, default=20)
+
+    randomParser = benchmarks.add_parser("random", help="per turn cost of the random draws of the cells")
+    randomParser.add_argument("--population-sizes", type=int, nargs="+", default=[1000, 10000, 100000])
+    randomParser.add_argument("--turns", type=int, default=20)
+
+    memoryParser = benchmarks.add_parser("memory", help="bytes per cell")
+    memoryParser.add_argument("--cell-counts", type=int, nargs="+", default=[1000, 10000, 100000])
+
+    importsParser = benchmarks.add_parser("imports", help="startup cost of the simulation modules, without rendering modules")
+    importsParser.add_argument("--modules", nargs="+", default=["simulation"])
+    importsParser.add_argument("--budget", type=float, default=None, help="fail above this many milliseconds per module")
+
+    outputParser = benchmarks.add_parser("output", help="turn throughput with verbose against quiet output")
+    outputParser.add_argument("--turns", type=int, default=10)
+
+    runsParser = benchmarks.add_parser("runs", help="simulations built, played and ended back to back in one process")
+    runsParser.add_argument("--runs", type=int, default=2)
+    runsParser.add_argument("--turns", type=int, default=5)
+
+    args = parser.parse_args()
+    if args.seed is not None:
+        SimulationRandom().reseed(args.seed)
+    match args.benchmark:
+        case "environment":
+            benchmarkEnvironment(args.grid_sizes, args.turns)
+        case "random":
+            benchmarkRandom(args.population_sizes, args.turns)
+        case "memory":
+            benchmarkMemory(args.cell_counts)
+        case "imports":
+            benchmarkImports(args.modules, args.budget)
+        case "output":
+            benchmarkOutput(args.turns, args.seed)
+        case "runs":
+            benchmarkRuns(args.runs, args.turns, args.seed)
@@ -0,0 +1,71 @@
+# LOG FILE: GAME OF WHY
+# CHARIS CAT 2024
+
+from config import LOG_LEVEL, LOG_RATE_LIMITS, LOG_COUNTERS_ONLY, LOG_SUMMARY_EVERY_N_TURNS
+from simulation_recorder import singleton
+
+DEBUG, INFO, WARNING, ERROR = 10, 20, 30, 40
+LEVELS = {"debug": DEBUG, "info": INFO, "warning": WARNING, "error": ERROR}
+
+@singleton
+class SimulationLog:
+    """
+    Messages of the simulation by category and level. A category prints at most its rate limit of messages per turn,
+    the ones over it are only counted. In counters only mode nothing is printed but a line of the counts every
+    summaryEvery turns
+    """
+    def __init__(self, level=LOG_LEVEL, rateLimits=LOG_RATE_LIMITS, countersOnly=LOG_COUNTERS_ONLY,
+                 summaryEvery=LOG_SUMMARY_EVERY_N_TURNS):
+        self.configure(level, rateLimits, countersOnly, summaryEvery)
+        self.reset()
+
+    def configure(self, level=LOG_LEVEL, rateLimits=LOG_RATE_LIMITS, countersOnly=LOG_COUNTERS_ONLY,
+                  summaryEvery=LOG_SUMMARY_EVERY_N_TURNS):
+        self.level = LEVELS[level]
+        self.rateLimits = rateLimits # category: messages printed per turn, no limit for the categories not in it
+        self.countersOnly = countersOnly
+        self.summaryEvery = summaryEvery
+
+    # Start the counts over for a new run, keeping the configuration
+    def reset(self):
+        self.counts = {} # category: messages over the run, printed or not
+        self.printedThisTurn = {}
+        self.droppedThisTurn = {}
+        self.turns = 0
+
+    # message is only formatted with args when it gets printed
+    def log(self, category, level, message, *args):
+        if level < self.level:
+            return
+        self.counts[category] = self.counts.get(category, 0) + 1
+        if self.countersOnly:
+            return
+        printed = self.printedThisTurn.get(category, 0)
+        limit = self.rateLimits.get(category)
+        if limit is not None and printed >= limit:
+            self.droppedThisTurn[category] = self.droppedThisTurn.get(category, 0) + 1
+            return
+        self.printedThisTurn[category] = printed + 1
+        print(message.format(*args) if args else message)
+
+    def debug(self, category, message, *args):
+        self.log(category, DEBUG, message, *args)
+
+    def info(self, category, message, *args):
+        self.log(category, INFO, message, *args)
+
+    def warning(self, category, message, *args):
+        self.log(category, WARNING, message, *args)
+
+    def error(self, category, message, *args):
+        self.log(category, ERROR, message, *args)
+
+    def endTurn(self):
+        self.turns += 1
+        if self.countersOnly:
+            if self.summaryEvery and self.turns % self.summaryEvery == 0:
+                print(f"Turn {self.turns - 1} messages: " + ", ".join(f"{category}: {count}" for category, count in self.counts.items()))
+        elif self.droppedThisTurn:
+            print("Not shown this turn: " + ", ".join(f"{count} {category}" for category, count in self.droppedThisTurn.items()))
+        self.printedThisTurn.clear()
+        self.droppedThisTurn.clear()
@@ -0,0 +1,38 @@
+# RANDOM FILE: GAME OF WHY
+# CHARIS CAT 2024
+
+import random
+import numpy as np
+
+import config
+from config import SIMULATION_SEED
+from simulation_recorder import singleton
+
+# Every subsystem draws from its own stream, so a change in how much one of them draws doesn't shift the others
+SUBSYSTEMS = ("environment", "spawn", "cells", "movement", "reproduction", "decay")
+
+@singleton
+class SimulationRandom:
+    """Seeded random streams of the simulation, a numpy Generator and a random.Random per subsystem"""
+    def __init__(self, seed=SIMULATION_SEED):
+        self.reseed(seed)
+
+    # Replace every stream and redraw the settings drawn from the seed, to be called before the simulation is built
+    # for a run to be replayed
+    def reseed(self, seed):
+        self.seed = seed
+        config.drawFertilityAges(seed)
+        self.generators = {}
+        self.randoms = {}
+        for subsystem, sequence in zip(SUBSYSTEMS, np.random.SeedSequence(seed).spawn(len(SUBSYSTEMS))):
+            numpySequence, pythonSequence = sequence.spawn(2)
+            self.generators[subsystem] = np.random.default_rng(numpySequence)
+            self.randoms[subsystem] = random.Random(int(pythonSequence.generate_state(1, np.uint64)[0]))
+
+    # numpy stream of a subsystem, for the batched phases
+    def generator(self, subsystem):
+        return self.generators[subsystem]
+
+    # random module stream of a subsystem, for the per cell code
+    def random(self, subsystem):
+        return self.randoms[subsystem]
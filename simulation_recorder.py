@@ -1,10 +1,21 @@
+import atexit
 from functools import partial, wraps
+from operator import attrgetter
+from glob import glob
+import gzip
+from queue import Queue
+from threading import Thread
 from os import makedirs
-from os.path import isdir
+from os.path import isdir, isfile, splitext
+import numpy as np
 
 from config import VISUALISATION_OUTPUT_FILE_SAVE_MAIN_FOLDER, VISUALISATION_OUTPUT_FILE_SAVE_SIM_FOLDER, \
                    RECORDER_PRINT_TO_STDOUT, RECORDER_PRINT_TO_FILE, CELL_MEMORY_DISPLAY_MODE, \
-                   RECORDER_STATS_DEFINITION, RECORDER_PRINT_MEMORIES
+                   RECORDER_STATS_DEFINITION, RECORDER_PRINT_MEMORIES, RECORDER_CERTIFICATE_FILE, \
+                   RECORDER_CERTIFICATE_FLUSH_EVERY_N, RECORDER_CERTIFICATE_GZIP, RECORDER_CERTIFICATE_ROTATE_SIZE, \
+                   RECORDER_CERTIFICATE_ECHO, RECORDER_ARCHIVE_FORMAT, RECORDER_ARCHIVE_ROW_GROUP_SIZE, \
+                   RECORDER_BACKGROUND_WRITER, RECORDER_WRITER_QUEUE_SIZE
+from genealogy import Genealogy
 
 def singleton(cls):
     """Make a class a Singleton class (only one instance)"""
@@ -16,25 +27,214 @@ def singleton(cls):
     wrapper_singleton.instance = None
     return wrapper_singleton
 
+class BackgroundWriter:
+    """
+    Runs the writes submitted to it in order on its own thread, submit() waiting while queueSize of them are pending.
+    A write that fails stops the following ones and its error is raised by the next submit() or close().
+    Without threaded, every write runs right away in submit()
+    """
+    def __init__(self, threaded=RECORDER_BACKGROUND_WRITER, queueSize=RECORDER_WRITER_QUEUE_SIZE):
+        self.error = None
+        self.thread = None
+        if threaded:
+            self.queue = Queue(queueSize)
+            self.thread = Thread(target=self.run, name="SimulationRecorder writer", daemon=True)
+            self.thread.start()
+
+    def run(self):
+        while True:
+            write = self.queue.get()
+            if write is None:
+                return
+            if self.error is None:
+                try:
+                    write()
+                except BaseException as error:
+                    self.error = error
+
+    def submit(self, write):
+        self.raiseError()
+        if self.thread is None:
+            write()
+        else:
+            self.queue.put(write)
+
+    def raiseError(self):
+        if self.error is not None:
+            error, self.error = self.error, None
+            raise error
+
+    # Wait for every pending write, then stop the thread
+    def close(self):
+        if self.thread is not None:
+            self.queue.put(None)
+            self.thread.join()
+            self.thread = None
+        self.raiseError()
+
+class CertificateWriter:
+    """
+    Text lines kept in memory and written out flushEvery at a time, to one file (gzipped or not) that is rotated
+    once rotateSize characters went to it: path, then path.1, path.2... before the extension.
+    The writes go through submit, BackgroundWriter.submit to have them done on its thread
+    """
+    def __init__(self, path, flushEvery=RECORDER_CERTIFICATE_FLUSH_EVERY_N, compress=RECORDER_CERTIFICATE_GZIP,
+                 rotateSize=RECORDER_CERTIFICATE_ROTATE_SIZE, echo=RECORDER_CERTIFICATE_ECHO, submit=None):
+        self.path = path + ".gz" if compress else path
+        self.flushEvery = max(1, flushEvery)
+        self.compress = compress
+        self.rotateSize = rotateSize
+        self.echo = echo
+        self.buffer = []
+        self.part = 0
+        self.written = 0
+        self.file = None
+        self.submit = submit if submit is not None else lambda write: write()
+
+    def write(self, line):
+        self.buffer.append(line)
+        if self.echo:
+            print(line)
+        if len(self.buffer) >= self.flushEvery:
+            self.flush()
+
+    def flush(self):
+        if not self.buffer:
+            return
+        text = "\n".join(self.buffer) + "\n"
+        self.buffer.clear()
+        self.submit(partial(self.writeText, text))
+
+    def writeText(self, text):
+        if self.file is None or (self.rotateSize and self.written and self.written + len(text) > self.rotateSize):
+            self.rotate()
+        self.file.write(text)
+        self.file.flush()
+        self.written += len(text)
+
+    def rotate(self):
+        if self.file is None:
+            path = self.path
+        else:
+            self.file.close()
+            self.part += 1
+            root, extension = splitext(self.path[:-3] if self.compress else self.path)
+            path = f"{root}.{self.part}{extension}" + (".gz" if self.compress else "")
+        self.file = gzip.open(path, "at") if self.compress else open(path, "a")
+        self.written = 0
+
+    def close(self):
+        self.flush()
+        self.submit(self.closeFile)
+
+    def closeFile(self):
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+
+class RecordArchive:
+    """
+    The records of the recorder as one typed column per stat, written a row group of rowGroupSize records at a time:
+    folder/records.parquet with pyarrow, or numbered folder/records-*.npz chunks. See loadRecordArchive
+    """
+    def __init__(self, folder, format=RECORDER_ARCHIVE_FORMAT, rowGroupSize=RECORDER_ARCHIVE_ROW_GROUP_SIZE):
+        if format == "parquet":
+            try:
+                import pyarrow
+                import pyarrow.parquet
+            except ImportError:
+                from simulation_log import SimulationLog # imported here, the log gets singleton from this module
+                SimulationLog().warning("recorder.archive", "pyarrow isn't installed, archiving the records as npz chunks")
+                format = "npz"
+        self.folder = folder
+        self.format = format
+        self.rowGroupSize = rowGroupSize
+        self.rows = []
+        self.chunk = 0
+        self.parquetWriter = None
+        if not isdir(folder):
+            makedirs(folder)
+
+    def append(self, stats):
+        self.rows.append(stats)
+
+    # Row groups are only written between turns
+    def endTurn(self):
+        if len(self.rows) >= self.rowGroupSize:
+            self.writeRowGroup()
+
+    def writeRowGroup(self):
+        if not self.rows:
+            return
+        columns = {stat: np.asarray([row[stat] for row in self.rows]) for stat in self.rows[0]}
+        self.rows.clear()
+        if self.format == "parquet":
+            import pyarrow
+            import pyarrow.parquet
+            table = pyarrow.table(columns)
+            if self.parquetWriter is None:
+                self.parquetWriter = pyarrow.parquet.ParquetWriter(f"{self.folder}/records.parquet", table.schema)
+            self.parquetWriter.write_table(table.cast(self.parquetWriter.schema))
+        else:
+            np.savez(f"{self.folder}/records-{self.chunk:06d}.npz", **columns)
+        self.chunk += 1
+
+    def close(self):
+        self.writeRowGroup()
+        if self.parquetWriter is not None:
+            self.parquetWriter.close()
+            self.parquetWriter = None
+
+def loadRecordArchive(folder, columns):
+    """Columns of a RecordArchive folder, as one array per column: only these columns are read from the files"""
+    if isfile(f"{folder}/records.parquet"):
+        import pyarrow.parquet
+        table = pyarrow.parquet.read_table(f"{folder}/records.parquet", columns=list(columns))
+        return {column: table.column(column).to_numpy() for column in columns}
+
+    parts = {column: [] for column in columns}
+    for chunk in sorted(glob(f"{folder}/records-*.npz")):
+        with np.load(chunk) as data:
+            for column in columns:
+                parts[column].append(data[column])
+    return {column: np.concatenate(part) if part else np.array([]) for column, part in parts.items()}
+
 @singleton
 class SimulationRecorder:
     recorder = None
+    runs = 0 # recorders made in this process, each writes to a folder of its own
     def __init__(self):
-        if not isdir(f"{VISUALISATION_OUTPUT_FILE_SAVE_MAIN_FOLDER}/{VISUALISATION_OUTPUT_FILE_SAVE_SIM_FOLDER}"):
-            makedirs(f"{VISUALISATION_OUTPUT_FILE_SAVE_MAIN_FOLDER}/{VISUALISATION_OUTPUT_FILE_SAVE_SIM_FOLDER}")
+        type(self).runs += 1
+        self.folder = f"{VISUALISATION_OUTPUT_FILE_SAVE_MAIN_FOLDER}/{VISUALISATION_OUTPUT_FILE_SAVE_SIM_FOLDER}"
+        if type(self).runs > 1:
+            self.folder += f"_{type(self).runs}"
+        if not isdir(self.folder):
+            makedirs(self.folder)
         self.outputStreams = []
         if RECORDER_PRINT_TO_FILE:
-            self.cellRecorder = open(f"{VISUALISATION_OUTPUT_FILE_SAVE_MAIN_FOLDER}/{VISUALISATION_OUTPUT_FILE_SAVE_SIM_FOLDER}/record.txt", "x")
+            self.cellRecorder = open(f"{self.folder}/record.txt", "x")
             self.outputStreams.append(partial(self.writeToFile, self.cellRecorder))
 
         if RECORDER_PRINT_TO_STDOUT:
             self.outputStreams.append(self.writeToStdout)
 
+        self.archive = None
+        if RECORDER_ARCHIVE_FORMAT is not None:
+            self.archive = RecordArchive(f"{self.folder}/records")
+
+        # Formatting and writing the records and certificates is left to the writer, on its own thread by default
+        self.writer = BackgroundWriter()
+        self.certificates = CertificateWriter(f"{self.folder}/{RECORDER_CERTIFICATE_FILE}",
+                                              submit=self.writer.submit)
+        atexit.register(self.end) # write out what is left even when the simulation crashed
+
         self.recorder = self
-        self.cellArchive = {}
-        self.records = []
+        self.cellArchive = {} # birth stats of the living cells, by id
+        self.genealogy = Genealogy()
+        self.records = [] # (kind, stats, cell) of the turn, the cells are let go once the records are printed
         self.birthRecordPattern = None
         self.deathRecordPattern = None
+        self.statExtractors = {True: None, False: None}
 
     def statNameToDisplayName(self, name):
         display = ""
@@ -74,8 +274,16 @@ class SimulationRecorder:
         return self.deathRecordPattern
 
     def end(self):
+        atexit.unregister(self.end)
+        self.certificates.close()
+        self.writer.submit(self.closeOutputs)
+        self.writer.close()
+
+    def closeOutputs(self):
         if RECORDER_PRINT_TO_FILE:
             self.cellRecorder.close()
+        if self.archive is not None:
+            self.archive.close()
 
     def endTurn(self):
         self.printRecords()
@@ -86,52 +294,98 @@ class SimulationRecorder:
     def writeToStdout(self, str):
         print(str)
 
+    # Birth and death certificates of the cells, buffered
+    def writeCertificate(self, certificate):
+        self.certificates.write(certificate)
+
+    # The birth stats of the living cells are kept by value until their death, the cells themselves aren't
     def recordBirth(self, cell):
-        self.cellArchive[cell.id] = {
-            "cell": cell,
-            "stats": self.buildStatArray(cell, True)
-        }
-        # self.records.append(("birth", self.cellArchive[cell.id]))
+        self.cellArchive[cell.id] = self.buildStatArray(cell, True)
+        self.genealogy.addBirths([cell.id], [cell.parentId])
+        # self.records.append(("birth", self.cellArchive[cell.id], cell))
 
     def recordDeath(self, cell):
         if not cell.id in self.cellArchive:
             raise Exception(f"This cell {cell.id} ({cell}) wasn't registered at birth")
         
-        self.cellArchive[cell.id]["stats"] |= self.buildStatArray(cell, False)
-        self.records.append(("death", self.cellArchive[cell.id]))
+        self.records.append(("death", self.cellArchive.pop(cell.id) | self.buildStatArray(cell, False), cell))
+
+    # recordBirth / recordDeath for several cells, each stat extracted as a whole column
+    def recordBirths(self, cells):
+        for cell, stats in zip(cells, self.buildStatRows(cells, True)):
+            self.cellArchive[cell.id] = stats
+        if cells:
+            self.genealogy.addBirths([cell.id for cell in cells], cells[0].population.parentId[[cell.slot for cell in cells]])
+
+    def recordDeaths(self, cells):
+        for cell, stats in zip(cells, self.buildStatRows(cells, False)):
+            if not cell.id in self.cellArchive:
+                raise Exception(f"This cell {cell.id} ({cell}) wasn't registered at birth")
 
-        del self.cellArchive[cell.id]
+            self.records.append(("death", self.cellArchive.pop(cell.id) | stats, cell))
 
     def getStatDefinition(self):
         return RECORDER_STATS_DEFINITION
 
-    def buildStatArray(self, cell, isBirth):
-        if isBirth:
-            prefix = "birth_"
-        else:
-            prefix = "death_"
-        statsToRecord = self.getStatDefinition()
-        stats = {}
-        for property in statsToRecord:
-            if "prefix" in property:
-                stat = property["prefix"] + property["stat"]
+    # RECORDER_STATS_DEFINITION compiled once into (key, extractor, attribute) triples, attribute being the cell
+    # attribute read by the extractor (None for the "record" ones)
+    def getStatExtractors(self, isBirth):
+        if self.statExtractors[isBirth] is None:
+            if isBirth:
+                prefix = "birth_"
             else:
-                stat = prefix + property["stat"]
-            if "record" in property:
-                stats[stat] = property["record"](cell, isBirth)
-            else:
-                if hasattr(cell, property["stat"]):
-                    stats[stat] = getattr(cell, property["stat"])
+                prefix = "death_"
+            extractors = []
+            for property in self.getStatDefinition():
+                stat = property.get("prefix", prefix) + property["stat"]
+                if "record" in property:
+                    extractors.append((stat, partial(property["record"], isBirth=isBirth), None))
                 else:
-                    raise Exception(f"Unable to find property {property["stat"]} on cell {cell.id} ({cell})")
+                    extractors.append((stat, attrgetter(property["stat"]), property["stat"]))
+            self.statExtractors[isBirth] = tuple(extractors)
+        return self.statExtractors[isBirth]
 
-        return stats
+    def buildStatArray(self, cell, isBirth):
+        try:
+            return {stat: extract(cell) for stat, extract, _ in self.getStatExtractors(isBirth)}
+        except AttributeError as error:
+            raise Exception(f"Unable to find property {error.name} on cell {cell.id} ({cell})")
 
+    # Stats of several cells, one dict per cell: the attributes living in a population column are read with one gather
+    def buildStatRows(self, cells, isBirth):
+        if not cells:
+            return []
+        population = cells[0].population
+        slots = [cell.slot for cell in cells]
+        columns = {}
+        for stat, extract, attribute in self.getStatExtractors(isBirth):
+            column = getattr(getattr(type(cells[0]), attribute or "", None), "column", None)
+            if column is not None:
+                columns[stat] = population.__dict__[column][slots].tolist()
+            else:
+                try:
+                    columns[stat] = [extract(cell) for cell in cells]
+                except AttributeError as error:
+                    raise Exception(f"Unable to find property {error.name} on cell {cells[0].id} ({cells[0]})")
+        return [dict(zip(columns, row)) for row in zip(*columns.values())]
+
+    # The records of the turn are handed to the writer with their memories, the only part still read from the cells
     def printRecords(self):
-        for record in self.records:
-            self.printRecord(record)
-        
-        self.records.clear()
+        if not self.records:
+            return
+        records = [(kind, stats, self.getMemories(cell) if RECORDER_PRINT_MEMORIES else None)
+                   for kind, stats, cell in self.records]
+        self.records = []
+        self.writer.submit(partial(self.writeRecords, records))
+
+    def writeRecords(self, records):
+        for record in records:
+            if self.archive is not None:
+                self.archive.append(record[1])
+            if self.outputStreams:
+                self.printRecord(record)
+        if self.archive is not None:
+            self.archive.endTurn()
 
     def printRecord(self, record):
         str_record = self.getRecord(*record)
@@ -144,16 +398,7 @@ class SimulationRecorder:
         if CELL_MEMORY_DISPLAY_MODE == "event":
             summary = {}
 
-            for memory_entry in cell.memory:
-                if len(memory_entry) == 3:
-                    turn_count, memory_type, details = memory_entry
-                elif len(memory_entry) == 2:
-                    turn_count, memory_type = memory_entry
-                    details = None
-                else:
-                    print(f"Unexpected memory format: {memory_entry}")
-                    continue
-
+            for turn_count, memory_type, details in cell.population.getMemories(cell.slot):
                 # Aggregate memory by type
                 if memory_type not in summary:
                     summary[memory_type] = []
@@ -172,15 +417,7 @@ class SimulationRecorder:
                         memories.append(f"  Turn {entry['turn']}: {entry['details']}")
         elif CELL_MEMORY_DISPLAY_MODE == "turn":
             last_turn = -1
-            for memory_entry in cell.memory:
-                if len(memory_entry) == 3:
-                    turn_count, memory_type, details = memory_entry
-                elif len(memory_entry) == 2:
-                    turn_count, memory_type = memory_entry
-                    details = None
-                else:
-                    print(f"Unexpected memory format: {memory_entry}")
-                    continue
+            for turn_count, memory_type, details in cell.population.getMemories(cell.slot):
                 if turn_count > last_turn:
                     last_turn = turn_count
                     memories.append(f"On Turn {turn_count}:")
@@ -191,15 +428,13 @@ class SimulationRecorder:
 
         return "\n".join(memories)
 
-    def getRecord(self, kind, record):
-        cell, stats = record["cell"], record["stats"]
+    def getRecord(self, kind, stats, memories=None):
         if kind == "birth":
             get_record_pattern = self.getBirthRecordPattern
         else:
             get_record_pattern = self.getDeathRecordPattern
         header = get_record_pattern().format(**stats)
-        if RECORDER_PRINT_MEMORIES:
-            memories = self.getMemories(cell)
+        if memories is not None:
             return header + "\n" + memories
 
-        return header # + "\n" + memories
\ No newline at end of file
+        return header # + "\n" + memories
@@ -1,69 +1,140 @@
 # STATS FILE: GAME OF WHY
 # CHARIS CAT 2024
 
+from enum import IntEnum
+import numpy as np
+from config import *
+from cell_population import CELL_STATES
+from simulation_log import SimulationLog
+
+# Every counter is a column of one array, the plain ones first, then one column per label of the counters kept by reason
+class Counter(IntEnum):
+    DEATH_ESCAPE = 0
+    DISINTEGRATION = 1
+    DISINTEGRATION_DEATH = 2
+    FORCED_SPAWN = 3
+    FAILED_FORCED_SPAWN = 4
+    STATE_STABLE = 5
+    MOVED = 6
+    PUSHED = 7
+    STOPPED = 8
+    PUSH_STUCK = 9
+    ALIVE = 10
+    YOUTH = 11
+    ELDERLY = 12
+    ADULT = 13
+
+DEATH_REASONS = (CELL_DEATH_REASON_STARVATION, CELL_DEATH_REASON_AGE, CELL_DEATH_REASON_SQUISH)
+BABY_REASONS = ("Fertile", "Attractive")
+BABY_FAILED_REASONS = ("Overpopulation", "Overpopulation (initial)", "Exhausted")
+STATE_CHANGES = CELL_STATES + ("???",) # "???": cells born without a state
+PUSH_CHAIN_LENGTHS = tuple(range(1, CELL_PUSH_CHAIN_MAX + 2))
+
+COLUMNS = [counter.name.lower() for counter in Counter]
+
+# Columns of a counter kept by reason: {label: column}
+def addColumnGroup(name, labels):
+    columns = {label: len(COLUMNS) + index for index, label in enumerate(labels)}
+    COLUMNS.extend(f"{name}:{getattr(label, 'value', label)}" for label in labels)
+    return columns
+
+DEATH_COLUMNS = addColumnGroup("death", DEATH_REASONS)
+BABY_COLUMNS = addColumnGroup("baby", BABY_REASONS)
+BABY_FAILED_COLUMNS = addColumnGroup("baby_failed", BABY_FAILED_REASONS)
+STATE_CHANGE_COLUMNS = addColumnGroup("state_change", STATE_CHANGES)
+PUSH_CHAIN_COLUMNS = addColumnGroup("push_row", PUSH_CHAIN_LENGTHS)
+COLUMNS = tuple(COLUMNS)
+
+# The counters as they used to be, read from the columns: a column over the whole run or this turn only...
+def counter(column, total=True):
+    if total:
+        return property(lambda self: int(self.totals[column] + self.turn[column]))
+    return property(lambda self: int(self.turn[column]))
+
+# ...and a counter kept by reason as {label: count} of the labels counted at least once
+def counterGroup(columns, total=True):
+    labels, indexes = tuple(columns), np.array(tuple(columns.values()))
+    def read(self):
+        counts = self.totals[indexes] + self.turn[indexes] if total else self.turn[indexes]
+        return {label: count for label, count in zip(labels, counts.tolist()) if count}
+    return property(read)
+
+# Stats keeps the counters of the current turn in one array, folded into the run totals when the next turn begins,
+# and every turn's counters in a time series (one row per turn) that can be exported at the end of a run. The counts
+# made before the first turn (the cells spawned by the automaton) go to the first turn's row, so the rows add up to the
+# totals
 class Stats:
+    cellDeathCounter = counterGroup(DEATH_COLUMNS)
+    cellDeathEscapeCounter = counter(Counter.DEATH_ESCAPE)
+    cellDisintegrationCounter = counter(Counter.DISINTEGRATION)
+    cellDisintegrationDeathCounter = counter(Counter.DISINTEGRATION_DEATH)
+    cellBabyCounter = counterGroup(BABY_COLUMNS)
+    cellBabysFailedCounter = counterGroup(BABY_FAILED_COLUMNS)
+    cellForcedSpawnCounter = counter(Counter.FORCED_SPAWN)
+    cellFailedForcedSpawnCounter = counter(Counter.FAILED_FORCED_SPAWN)
+    cellStateChange = counterGroup(STATE_CHANGE_COLUMNS)
+    cellStateStable = counter(Counter.STATE_STABLE)
+    cellMovedCounter = counter(Counter.MOVED)
+    cellPushedCounter = counter(Counter.PUSHED)
+    cellStoppedCounter = counter(Counter.STOPPED)
+    cellPushChainLengths = counterGroup(PUSH_CHAIN_COLUMNS) # number of cells in each push row resolved: count
+    cellPushStuckCounter = counter(Counter.PUSH_STUCK)
+
+    # TURN STATISTICS
+    cellBabysThisTurn = counterGroup(BABY_COLUMNS, total=False)
+    cellBabysFailedThisTurn = counterGroup(BABY_FAILED_COLUMNS, total=False)
+    cellDeathsThisTurn = counterGroup(DEATH_COLUMNS, total=False)
+    cellDeathEscapesThisTurn = counter(Counter.DEATH_ESCAPE, total=False)
+    cellMovedThisTurn = counter(Counter.MOVED, total=False)
+    cellPushedThisTurn = counter(Counter.PUSHED, total=False)
+    cellStoppedThisTurn = counter(Counter.STOPPED, total=False)
+    cellPushChainLengthsThisTurn = counterGroup(PUSH_CHAIN_COLUMNS, total=False)
+    cellPushStuckThisTurn = counter(Counter.PUSH_STUCK, total=False)
+    cellAliveCount = counter(Counter.ALIVE, total=False)
+    cellYouthCount = counter(Counter.YOUTH, total=False)
+    cellElderlyCount = counter(Counter.ELDERLY, total=False)
+    cellAdultCount = counter(Counter.ADULT, total=False)
+    cellStateStableThisTurn = counter(Counter.STATE_STABLE, total=False)
+    cellStateChangeThisTurn = counterGroup(STATE_CHANGE_COLUMNS, total=False)
+
     def __init__(self):
         # Population
         self.cellCounter = 0
 
-        # death statistics
-        self.cellDeathCounter = {}
-        self.cellDeathEscapeCounter = 0
-        self.cellDisintegrationCounter = 0
-        self.cellDisintegrationDeathCounter = 0
-
-        # birth statistics
-        self.cellBabyCounter = {}
-        self.cellBabysFailedCounter = {}
-        self.cellForcedSpawnCounter = 0
-        self.cellFailedForcedSpawnCounter = 0
-
-        # state statistits
-        self.cellStateChange = {}
-        self.cellStateChangeThisTurn = {}
-        self.cellStateStable = 0
-        self.cellStateStableThisTurn = 0
-
-        # Movement statistics
-        self.cellMovedCounter = 0
-        self.cellPushedCounter = 0
-        self.cellStoppedCounter = 0
-
-        # TURN STATISTICS
-        self.cellBabysThisTurn = {}
-        self.cellBabysFailedThisTurn = {}
-        self.cellDeathsThisTurn = {}
-        self.cellDeathEscapesThisTurn = 0
-        self.cellMovedThisTurn = 0
-        self.cellPushedThisTurn = 0
-        self.cellStoppedThisTurn = 0
-        self.cellAliveCount = 0
-        self.cellYouthCount = 0
-        self.cellElderlyCount = 0
-        self.cellAdultCount = 0
+        self.turn = np.zeros(len(COLUMNS), dtype=np.int64)
+        self.totals = np.zeros(len(COLUMNS), dtype=np.int64)
+        self.history = np.zeros((NUM_STEPS + 1, len(COLUMNS)), dtype=np.int64)
+        self.historyLength = 0
 
     def beginTurn(self):
-        self.cellBabysThisTurn = {}
-        self.cellDeathsThisTurn = {}
-        self.cellDeathEscapesThisTurn = 0
-        self.cellBabysFailedThisTurn = {}
-        self.cellPushedThisTurn = 0
-        self.cellMovedThisTurn = 0
-        self.cellStoppedThisTurn = 0
-        self.cellAliveCount = 0
-        self.cellYouthCount = 0
-        self.cellElderlyCount = 0
-        self.cellAdultCount = 0
-        self.cellStateStableThisTurn = 0
-        self.cellStateChangeThisTurn = {}
+        if self.historyLength == 0:
+            return
+        self.totals += self.turn
+        self.turn[:] = 0
 
     def endTurn(self):
-        print(f"Turn Summary: There are currently {self.cellAliveCount} living cells. There were {self.getBabysCountThisTurn()} babies born, {self.getDeathsThisTurn()} cells died, and {self.cellDeathEscapesThisTurn} cells evaded death! ")
-        print(self)
+        if self.historyLength == len(self.history):
+            self.history = np.concatenate((self.history, np.zeros_like(self.history)))
+        self.history[self.historyLength] = self.turn
+        self.historyLength += 1
+        log = SimulationLog()
+        if log.summaryEvery and self.historyLength % log.summaryEvery == 0:
+            log.info("turn", "Turn Summary: There are currently {} living cells. There were {} babies born, {} cells died, and {} cells evaded death! ",
+                     self.cellAliveCount, self.getBabysCountThisTurn(), self.getDeathsThisTurn(), self.cellDeathEscapesThisTurn)
+        log.debug("stats", "{}", self)
 
     def endRun(self):
         print(self)
 
+    # Counters of every turn played, one row per turn, to a .npz (columns and history arrays) or a CSV file
+    def exportHistory(self, path):
+        history = self.history[:self.historyLength]
+        if path.endswith(".npz"):
+            np.savez(path, columns=np.array(COLUMNS), history=history)
+        else:
+            np.savetxt(path, np.column_stack((np.arange(len(history)), history)), fmt="%d", delimiter=",",
+                       header=",".join(("turn",) + COLUMNS), comments="")
+
     def __str__(self):
         return f"""
 Total Cell Count: {self.cellCounter+1}
@@ -89,6 +160,9 @@ Total Cell Babies Unspawned: {self.cellFailedForcedSpawnCounter}
 Total Cell Movements: {self.cellMovedCounter}
 Total Cell Pushed: {self.cellPushedCounter}
 Total Cell Stopped: {self.cellStoppedCounter}
+Push Rows By Length:
+{"\n".join([f"{x}: {self.cellPushChainLengths[x]}" for x in sorted(self.cellPushChainLengths)])}
+Total Push Rows Too Long: {self.cellPushStuckCounter}
 
 # State Statistics
 Total State Changes: {self.getCellStateChangeTotal()}
@@ -105,6 +179,7 @@ Cell Escapes: {self.cellDeathEscapesThisTurn}
 Cell Movements: {self.cellMovedThisTurn}
 Cell Pushes: {self.cellPushedThisTurn}
 Cell Stops: {self.cellStoppedThisTurn}
+Cell Push Rows: {self.cellPushChainLengthsThisTurn} (too long: {self.cellPushStuckThisTurn})
 Cells Alive: {self.cellAliveCount} (Youth: {self.cellYouthCount}, Adults: {self.cellAdultCount}, Elderly: {self.cellElderlyCount})
 Switched Cell States: {self.getCellStateChangesThisTurn()} 
 By State:
@@ -112,110 +187,72 @@ By State:
 Stable Cell States: {self.cellStateStableThisTurn}
 """
 
-    def addCellBaby(self, reason):
-        if reason in self.cellBabyCounter:
-            self.cellBabyCounter[reason] += 1
-
-        else:
-            self.cellBabyCounter[reason] = 1
-        
-        if reason in self.cellBabysThisTurn:
-            self.cellBabysThisTurn[reason] += 1
-
-        else:
-            self.cellBabysThisTurn[reason] = 1
+    # count lets a batch of cells be recorded at once
+    def addCellBaby(self, reason, count=1):
+        self.turn[BABY_COLUMNS[reason]] += count
     
-    def addCellBabyFailed(self, reason):
-        if reason in self.cellBabysFailedCounter:
-            self.cellBabysFailedCounter[reason] += 1
-        else:
-            self.cellBabysFailedCounter[reason] = 1
-
-        if reason in self.cellBabysFailedThisTurn:
-            self.cellBabysFailedThisTurn[reason] += 1
-        else:
-            self.cellBabysFailedThisTurn[reason] = 1
+    def addCellBabyFailed(self, reason, count=1):
+        self.turn[BABY_FAILED_COLUMNS[reason]] += count
     
-    def addCellDeath(self, reason):
-        if reason in self.cellDeathCounter:
-            self.cellDeathCounter[reason] += 1
-        else:
-            self.cellDeathCounter[reason] = 1
-        
-        if reason in self.cellDeathsThisTurn:
-            self.cellDeathsThisTurn[reason] += 1
-        else:
-            self.cellDeathsThisTurn[reason] = 1
+    def addCellDeath(self, reason, count=1):
+        self.turn[DEATH_COLUMNS[reason]] += count
 
     def addCellDeathEscape(self):
-        self.cellDeathEscapeCounter += 1
-        self.cellDeathEscapesThisTurn += 1
+        self.turn[Counter.DEATH_ESCAPE] += 1
 
     def addCellPush(self):
-        self.cellPushedCounter += 1
-        self.cellPushedThisTurn += 1
+        self.turn[Counter.PUSHED] += 1
     
-    def addCellAlive(self):
-        self.cellAliveCount += 1
+    def addCellAlive(self, count=1):
+        self.turn[Counter.ALIVE] += count
+
+    def addCellMove(self, count=1):
+        self.turn[Counter.MOVED] += count
 
-    def addCellMove(self):
-        self.cellMovedCounter += 1
-        self.cellMovedThisTurn += 1
+    def addCellStop(self, count=1):
+        self.turn[Counter.STOPPED] += count
 
-    def addCellStop(self):
-        self.cellStoppedCounter += 1
-        self.cellStoppedThisTurn += 1
+    def addPushChain(self, length):
+        self.turn[PUSH_CHAIN_COLUMNS[length]] += 1
+
+    def addCellPushStuck(self):
+        self.turn[Counter.PUSH_STUCK] += 1
 
     def addCellForcedSpawn(self):
-        self.cellForcedSpawnCounter += 1
+        self.turn[Counter.FORCED_SPAWN] += 1
 
     def addCellFailedForcedSpawn(self):
-        self.cellFailedForcedSpawnCounter += 1
+        self.turn[Counter.FAILED_FORCED_SPAWN] += 1
 
-    def addCellYouth(self):
-        self.cellYouthCount += 1
+    def addCellYouth(self, count=1):
+        self.turn[Counter.YOUTH] += count
     
-    def addCellElderly(self):
-        self.cellElderlyCount += 1
+    def addCellElderly(self, count=1):
+        self.turn[Counter.ELDERLY] += count
 
-    def addCellAdult(self):
-        self.cellAdultCount += 1
+    def addCellAdult(self, count=1):
+        self.turn[Counter.ADULT] += count
 
-    def addCellDisintegration(self):
-        self.cellDisintegrationCounter += 1
+    def addCellDisintegration(self, count=1):
+        self.turn[Counter.DISINTEGRATION] += count
 
-    def addCellDisintegrationDeath(self):
-        self.cellDisintegrationDeathCounter += 1
+    def addCellDisintegrationDeath(self, count=1):
+        self.turn[Counter.DISINTEGRATION_DEATH] += count
 
     def getTotalDeath(self):
-        total = 0
-        for reason in self.cellDeathCounter:
-            total += self.cellDeathCounter[reason]
-        return total
+        return sum(self.cellDeathCounter.values())
 
     def getDeathsThisTurn(self):
-        sum = 0
-        for reason in self.cellDeathsThisTurn:
-            sum += self.cellDeathsThisTurn[reason]
-        return sum
+        return sum(self.cellDeathsThisTurn.values())
     
     def getCellStateChangeTotal(self):
-        total = 0
-        for reason in self.cellStateChange:
-            total += self.cellStateChange[reason]
-        return total
+        return sum(self.cellStateChange.values())
 
     def getCellStateChangesThisTurn(self):
-        sum = 0
-        for reason in self.cellStateChangeThisTurn:
-            sum += self.cellStateChangeThisTurn[reason]
-        return sum
+        return sum(self.cellStateChangeThisTurn.values())
 
     def getBabysCountThisTurn(self):
-        sum = 0 
-        for kind in self.cellBabysThisTurn:
-            sum += self.cellBabysThisTurn[kind]
-        return sum
+        return sum(self.cellBabysThisTurn.values())
 
     def getCellNextID(self):
         ret = self.cellCounter
@@ -223,17 +260,16 @@ Stable Cell States: {self.cellStateStableThisTurn}
         return ret
     
     def addCellStateStable(self):
-        self.cellStateStable += 1
-        self.cellStateStableThisTurn += 1
+        self.turn[Counter.STATE_STABLE] += 1
     
-    def addCellStateChange(self, newState):
-        if newState in self.cellStateChange:
-            self.cellStateChange[newState] += 1
-        else:
-            self.cellStateChange[newState] = 1
-        
-        if newState in self.cellStateChangeThisTurn:
-            self.cellStateChangeThisTurn[newState] += 1
-        else:
-            self.cellStateChangeThisTurn[newState] = 1
+    # Batch versions of addCellStateStable / addCellStateChange for the vectorized phase transition,
+    # counts holds the number of cells that changed to each state, indexed like CELL_STATES
+    def addCellStateStables(self, count):
+        self.turn[Counter.STATE_STABLE] += count
+
+    def addCellStateChanges(self, counts):
+        first = STATE_CHANGE_COLUMNS[CELL_STATES[0]]
+        self.turn[first:first + len(CELL_STATES)] += counts
 
+    def addCellStateChange(self, newState, count=1):
+        self.turn[STATE_CHANGE_COLUMNS[newState]] += count
@@ -1,4 +1,3 @@
-from vispy import app, scene
 import numpy as np
 from config import *
 from cell import Cell
@@ -12,6 +11,7 @@ class Visualisation:
         self.signalGrid = signalGrid
         self.inertGrid = inertGrid
         self.lightGrid = lightGrid
+        from vispy import scene # vispy is only loaded once a window is opened
 
         # Create Vispy canvas and scene
         self.canvas = scene.SceneCanvas(keys='interactive', show=True, title="Game of Why")
@@ -29,7 +29,7 @@ class Visualisation:
 
         # Add a layer for cell visualization
         self.cell_layer = scene.visuals.Image(np.zeros((GRID_SIZE, GRID_SIZE, 4), dtype=np.float32), parent=self.view.scene)
-        #print(f"Unique cell states: {np.unique([str(cell.state) for row in self.environments.grid for cell in row if isinstance(cell, Cell)])}")
+        #print(f"Unique cell states: {np.unique([str(cell.state) for cell in self.environments.population.cells if isinstance(cell, Cell)])}")
 
     def update_grid(self):
         """
@@ -39,13 +39,11 @@ class Visualisation:
         cell_data = np.zeros((GRID_SIZE, GRID_SIZE, 4), dtype=np.float32)  # RGBA
 
         # Process cell data
-        for x in range(self.environments.grid.shape[0]):
-            for y in range(self.environments.grid.shape[1]):
-                cell = self.environments.grid[x, y]
-                if isinstance(cell, Cell):
-                    color = cell.getCellColor()  # Assuming this returns an RGB tuple
-                    alpha = 0.9 if cell.alive else 0.3  # Adjust transparency based on state
-                    cell_data[x, y] = (*color, alpha)
+        for x, y in self.environments.getCellPositions():
+            cell = self.environments.getCellAt(x, y)
+            color = cell.getCellColor()  # Assuming this returns an RGB tuple
+            alpha = 0.9 if cell.alive else 0.3  # Adjust transparency based on state
+            cell_data[x, y] = (*color, alpha)
 
         # Update the cell layer visual
         self.cell_layer.set_data(cell_data)
@@ -73,6 +71,7 @@ class Visualisation:
             self.endRun(turn)
 
         # Process events to keep the visualization responsive
+        from vispy import app
         app.process_events()
 
     def endRun(self, turn):
@@ -1,7 +1,6 @@
 # VISUALISATION FILE: GAME OF WHY
 # CHARIS CAT 2024
 
-import matplotlib.pyplot as plt
 from os import makedirs
 from os.path import isdir
 from config import *
@@ -9,6 +8,7 @@ from cell import *
 
 class Visualisation:
     def __init__(self, stats, environments):
+        import matplotlib.pyplot as plt # matplotlib is only loaded once a figure is opened
         # Visualization and Interaction
         self.stats = stats
         self.environments = environments
@@ -25,6 +25,7 @@ class Visualisation:
                 makedirs(f"{VISUALISATION_OUTPUT_FILE_SAVE_MAIN_FOLDER}/{VISUALISATION_OUTPUT_FILE_SAVE_SIM_FOLDER}/")
 
     def runLoop(self, turn, end=False):
+        import matplotlib.pyplot as plt
         print(f"Step {turn} start visualisation {self.displaySignalGrid}, {self.displayInertGrid}, {self.displayWaifuGrid}, {self.displayLightGrid}")
         if self.needRender(turn, end):
             self.ax.clear()
@@ -38,16 +39,15 @@ class Visualisation:
             if self.displayLightGrid:
                 self.ax.imshow(self.environments.lightGrid, cmap=LIGHT_GRID_COLORMAP) # interpolation = "bilinear"
 
-            for x in range(self.environments.grid.shape[0]):
-                for y in range(self.environments.grid.shape[1]):
-                    cell = self.environments.grid[x,y]
-                    if isinstance(cell, Cell): #and cell.alive:
-                        if cell.alive:
-                            self.stats.addCellAlive()
-                        try:
-                            self.ax.add_patch(plt.Rectangle((cell.y - 0.5, cell.x - 0.5), 1, 1, color=cell.getCellColor()))
-                        except Exception as e:
-                            print(f"Exception: Color is {cell.getCellColor()} (current energy {cell.energy} top_energy {cell.topEnergy}) ; state: {cell.state} alive: {cell.alive} {cell} ({e})")
+            alive = 0 # the cells alive this turn are counted by the simulation once the turn is played
+            for x, y in self.environments.getCellPositions():
+                cell = self.environments.getCellAt(x, y)
+                if cell.alive:
+                    alive += 1
+                try:
+                    self.ax.add_patch(plt.Rectangle((cell.y - 0.5, cell.x - 0.5), 1, 1, color=cell.getCellColor()))
+                except Exception as e:
+                    print(f"Exception: Color is {cell.getCellColor()} (current energy {cell.energy} top_energy {cell.topEnergy}) ; state: {cell.state} alive: {cell.alive} {cell} ({e})")
             """
             for organism in organisms:
                 if organism.is_alive():
@@ -81,8 +81,8 @@ class Visualisation:
             #     full_key.append(patch)
             # self.ax.legend(handles=full_key)
 
-            self.ax.set_title(f"Step {turn + 1} ({self.stats.cellAliveCount})")
-            print(f"Done plotting, {self.stats.cellAliveCount} cells are alive and displayed")
+            self.ax.set_title(f"Step {turn + 1} ({alive})")
+            print(f"Done plotting, {alive} cells are alive and displayed")
             if self.needSave(turn, False):
                 self.saveToFile(turn, False)
             if not VISUALISATION_OUTPUT_SCREEN_DISABLE:
@@ -90,6 +90,7 @@ class Visualisation:
 
     # Ends the run after a 60 seconds timer
     def endRun(self, turn):
+        import matplotlib.pyplot as plt
         if self.needSave(turn, True):
             self.saveToFile(turn, True)
         if not VISUALISATION_OUTPUT_SCREEN_DISABLE:
@@ -109,6 +110,7 @@ class Visualisation:
                (end and VISUALISATION_OUTPUT_FILE_SAVE_FINAL_TURN)
 
     def saveToFile(self, turn, end):
+        import matplotlib.pyplot as plt
         plt.savefig(f"{VISUALISATION_OUTPUT_FILE_SAVE_MAIN_FOLDER}/{VISUALISATION_OUTPUT_FILE_SAVE_SIM_FOLDER}/Turn_{turn}.{VISUALISATION_OUTPUT_FILE_SAVE_FORMAT}")
 
     def on_click(self, event):